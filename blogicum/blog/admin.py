@@ -1,7 +1,38 @@
 from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin
+
+from .models import Category, ImageJob, Location, Post
+from .purge import soft_delete_post, soft_delete_user
+
+User = get_user_model()
+
+
+@admin.action(description='Удалить в фоне вместе с комментариями')
+def delete_posts_in_background(modeladmin, request, queryset):
+    for post in queryset:
+        soft_delete_post(post)
+
+
+@admin.action(description='Удалить в фоне вместе с постами и комментариями')
+def delete_users_in_background(modeladmin, request, queryset):
+    for user in queryset:
+        soft_delete_user(user)
+
+
+@admin.register(Post)
+class PostAdmin(admin.ModelAdmin):
+    actions = (delete_posts_in_background,)
+
+
+admin.site.unregister(User)
+
+
+@admin.register(User)
+class BlogUserAdmin(UserAdmin):
+    actions = (delete_users_in_background,)
 
-from .models import Category, Location, Post
 
 admin.site.register(Category)
 admin.site.register(Location)
-admin.site.register(Post)
+admin.site.register(ImageJob)
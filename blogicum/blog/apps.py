@@ -1,7 +1,17 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
 
 
 class BlogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blog'
     verbose_name = 'Блог'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .db import configure_sqlite, track_connection_open
+        connection_created.connect(configure_sqlite)
+        connection_created.connect(track_connection_open)
+        from .search import ensure_search_triggers
+        post_migrate.connect(ensure_search_triggers, sender=self)
@@ -0,0 +1,219 @@
+"""Кеширование страниц блога.
+
+Кеш готовых страниц для анонимных посетителей, кеш карточек постов и
+условные GET-запросы (ETag, Last-Modified).
+"""
+import hashlib
+from functools import wraps
+
+from django.core.cache import cache
+from django.shortcuts import render
+from django.utils import timezone
+from django.utils.cache import (
+    get_conditional_response,
+    patch_vary_headers,
+    quote_etag,
+)
+from django.utils.http import http_date, parse_http_date_safe
+
+from .routers import read_replica
+from .utils import cache_timeout, feed_cache_timeout
+
+PAGE_KEY_PREFIX = 'blog:page'
+VERSION_KEY_PREFIX = 'blog:page-version'
+CARD_KEY_PREFIX = 'blog:card'
+# Увеличить при изменении includes/post_card.html, чтобы не выдавать
+# карточки, отрисованные старым шаблоном.
+CARD_TEMPLATE_VERSION = 2
+STATS_KEYS = {
+    'hits': 'blog:page-cache:hits',
+    'misses': 'blog:page-cache:misses',
+}
+
+# Версии, от которых зависят страницы:
+# feeds — лента и страницы категорий (карточки, счётчики комментариев);
+# post:<id> — страница конкретного поста;
+# global — то, что выводится на любой странице (категории, места, авторы).
+FEEDS = 'feeds'
+GLOBAL = 'global'
+
+
+def post_scope(post_id):
+    return f'post:{post_id}'
+
+
+def version_key(scope):
+    return f'{VERSION_KEY_PREFIX}:{scope}'
+
+
+def incr_counter(key, delta=1):
+    """Атомарно увеличивает бессрочный счётчик в кеше."""
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        cache.add(key, 0, None)
+        return cache.incr(key, delta)
+
+
+def invalidate_pages(*scopes):
+    """Сбрасывает все закешированные страницы, зависящие от scopes."""
+    for scope in scopes:
+        incr_counter(version_key(scope))
+
+
+def get_page_cache_stats():
+    """Счётчики попаданий и промахов кеша страниц для мониторинга."""
+    values = cache.get_many(STATS_KEYS.values())
+    return {
+        name: values.get(key, 0) for name, key in STATS_KEYS.items()
+    }
+
+
+def post_card_key(post):
+    """Ключ HTML карточки поста.
+
+    updated_at меняется при любом сохранении поста; остальное —
+    выводимые в карточке данные, которые меняются без него: счётчик
+    комментариев, копии изображения, автор, категория и место.
+    """
+    category = post.category
+    location = post.location
+    signature = repr((
+        CARD_TEMPLATE_VERSION,
+        post.updated_at,
+        post.comment_count,
+        post.image_meta,
+        post.author.username,
+        category and (category.slug, category.title, category.is_published),
+        location and (location.name, location.is_published),
+    ))
+    digest = hashlib.md5(signature.encode()).hexdigest()
+    return f'{CARD_KEY_PREFIX}:{post.pk}:{digest}'
+
+
+def page_validators(request, parts, modified):
+    """Возвращает ETag и Last-Modified страницы.
+
+    ``modified`` — даты изменения выведенных объектов, ``parts`` — всё
+    остальное, от чего зависит HTML страницы. Текущий пользователь
+    добавляется здесь. Last-Modified не заходит в будущее: автор видит
+    в профиле свои отложенные публикации.
+    """
+    dates = [date for date in modified if date is not None]
+    user = request.user
+    signature = repr((user.pk, user.get_username(), *parts, dates))
+    etag = quote_etag(hashlib.md5(signature.encode()).hexdigest())
+    last_modified = min(max(dates), timezone.now()) if dates else None
+    return etag, last_modified
+
+
+def feed_validators(request, page_obj, *parts, modified=()):
+    """Валидаторы страницы ленты по уже выбранным карточкам.
+
+    Только ETag: состав страницы меняется и без новых дат — пост сняли
+    с публикации, удалили или скрыли его категорию, — и Last-Modified
+    по выведенным строкам дал бы устаревший 304. ``modified`` — даты
+    прочих выведенных объектов, они входят в ETag.
+    """
+    posts = list(page_obj)
+    if getattr(page_obj, 'is_keyset', False):
+        pagination = (page_obj.has_previous(), page_obj.has_next())
+    else:
+        pagination = (page_obj.number, page_obj.paginator.count)
+    etag, _ = page_validators(
+        request,
+        (*parts, pagination, [post_card_key(post) for post in posts]),
+        modified,
+    )
+    return etag, None
+
+
+def conditional_render(request, template_name, context, validators):
+    """Рендерит шаблон, только если у клиента нет актуальной копии.
+
+    Иначе отвечает 304 без обращения к шаблонам.
+    """
+    etag, last_modified = validators
+    last_modified = last_modified and int(last_modified.timestamp())
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = render(request, template_name, context)
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def _page_key(request, view_name, scopes, args, kwargs):
+    version_keys = [version_key(scope) for scope in scopes]
+    versions = cache.get_many(version_keys)
+    signature = repr((
+        args,
+        sorted(kwargs.items()),
+        sorted(request.GET.lists()),
+        [versions.get(key, 0) for key in version_keys],
+    ))
+    digest = hashlib.md5(signature.encode()).hexdigest()
+    return f'{PAGE_KEY_PREFIX}:{view_name}:{digest}'
+
+
+def cache_page_for_anonymous(get_scopes):
+    """Кеширует ответ view для неаутентифицированных GET-запросов.
+
+    ``get_scopes(*args, **kwargs)`` возвращает области, при сбросе
+    которых (см. invalidate_pages) закешированная страница устаревает.
+    Страницы лент живут не дольше, чем до ближайшей отложенной
+    публикации. Авторизованные пользователи всегда получают свежую
+    страницу. При промахе страница строится по основной базе, даже если
+    для запроса выбрана реплика.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            timeout = cache_timeout('BLOG_PAGE_CACHE_TIMEOUT')
+            if (
+                not timeout
+                or request.method not in ('GET', 'HEAD')
+                or request.user.is_authenticated
+            ):
+                return view(request, *args, **kwargs)
+
+            scopes = (GLOBAL, *get_scopes(*args, **kwargs))
+            key = _page_key(request, view.__name__, scopes, args, kwargs)
+            response = cache.get(key)
+            if response is not None:
+                incr_counter(STATS_KEYS['hits'])
+                response = get_conditional_response(
+                    request,
+                    etag=response.get('ETag'),
+                    last_modified=parse_http_date_safe(
+                        response.get('Last-Modified')),
+                    response=response,
+                )
+                response['X-Page-Cache'] = 'HIT'
+                return response
+
+            incr_counter(STATS_KEYS['misses'])
+            # Страница попадёт в кеш под свежей версией, поэтому при
+            # промахе читаем с основной базы: реплика могла ещё не
+            # получить изменение, из-за которого версия сменилась.
+            request.read_db = None
+            token = read_replica.set(None)
+            try:
+                response = view(request, *args, **kwargs)
+            finally:
+                read_replica.reset(token)
+            patch_vary_headers(response, ('Cookie',))
+            if (
+                response.status_code == 200
+                and not response.streaming
+                and not response.cookies
+            ):
+                if FEEDS in scopes:
+                    timeout = feed_cache_timeout(timeout)
+                cache.set(key, response, timeout)
+            response['X-Page-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,166 @@
+"""Отложенная запись комментариев для всплесков нагрузки.
+
+При BLOG_COMMENT_QUEUE add_comment не пишет в базу: проверенный
+комментарий сохраняется отдельным файлом в BLOG_COMMENT_QUEUE_DIR
+(запись во временный файл и атомарное переименование, как в Maildir),
+поэтому запросы не ждут блокировку записи SQLite. Команда
+flush_comments переносит накопившиеся комментарии в базу пачками
+через bulk_create. Пока комментарий в очереди, автор видит его на
+странице поста: файлы лежат в каталогах <post_id>/<author_id>/, общих
+для всех процессов, и страница читает их из своего каталога.
+"""
+import json
+import os
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .cache import FEEDS, invalidate_pages, post_scope
+from .models import Comment, Post
+
+QUEUE_SUFFIX = '.json'
+
+
+def queue_enabled():
+    return getattr(settings, 'BLOG_COMMENT_QUEUE', False)
+
+
+def queue_dir():
+    return Path(settings.BLOG_COMMENT_QUEUE_DIR)
+
+
+def pending_dir(post_id, author_id):
+    """Каталог очереди с комментариями автора к посту."""
+    return queue_dir() / str(post_id) / str(author_id)
+
+
+def enqueue_comment(comment):
+    """Ставит несохранённый комментарий в очередь на запись."""
+    entry = {
+        # Имя файла задаёт порядок записи в базу.
+        'id': f'{time.time_ns():020d}-{uuid.uuid4().hex}',
+        'post_id': comment.post_id,
+        'author_id': comment.author_id,
+        'text': comment.text,
+        'created_at': timezone.now().isoformat(),
+    }
+    directory = pending_dir(comment.post_id, comment.author_id)
+    directory.mkdir(parents=True, exist_ok=True)
+    tmp_path = directory / f'.{entry["id"]}.tmp'
+    tmp_path.write_text(json.dumps(entry, ensure_ascii=False),
+                        encoding='utf-8')
+    os.replace(tmp_path, directory / f'{entry["id"]}{QUEUE_SUFFIX}')
+    return entry
+
+
+def get_pending_comments(post, user):
+    """Комментарии пользователя к посту, ещё не записанные в базу.
+
+    Возвращает несохранённые Comment (без id) в порядке отправки.
+    Файлы, которые обработчик успел записать и удалить, пропускаются.
+    """
+    if not user.is_authenticated:
+        return []
+    comments = []
+    for path in sorted(pending_dir(post.pk, user.pk).glob(f'*{QUEUE_SUFFIX}')):
+        try:
+            entry = json.loads(path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            continue
+        comments.append(Comment(
+            post=post,
+            author=user,
+            text=entry['text'],
+            created_at=parse_datetime(entry['created_at']),
+        ))
+    return comments
+
+
+def queued_paths():
+    """Файлы очереди в порядке отправки комментариев."""
+    return sorted(
+        queue_dir().glob(f'*/*/*{QUEUE_SUFFIX}'), key=lambda path: path.name)
+
+
+def read_entries(paths):
+    """Читает файлы очереди; повреждённые переименовываются в *.bad."""
+    entries = []
+    for path in paths:
+        try:
+            entries.append(json.loads(path.read_text(encoding='utf-8')))
+        except (OSError, ValueError):
+            path.rename(path.with_suffix('.bad'))
+    return entries
+
+
+def restore_created_at(comments, created_at):
+    """Возвращает записанным bulk_create комментариям время отправки.
+
+    auto_now_add при вставке ставит текущее время. SQLite не сообщает id
+    вставленных строк, но до конца транзакции держит блокировку записи,
+    поэтому это последние len(comments) id таблицы.
+    """
+    if not comments:
+        return
+    if any(comment.pk is None for comment in comments):
+        ids = list(Comment.objects.order_by('-pk').values_list(
+            'pk', flat=True)[:len(comments)])
+        for comment, pk in zip(comments, reversed(ids)):
+            comment.pk = pk
+    for comment, value in zip(comments, created_at):
+        comment.created_at = value
+    Comment.objects.bulk_update(comments, ['created_at'])
+
+
+def flush_comments(batch_size):
+    """Записывает в базу до batch_size комментариев из очереди.
+
+    Комментарии к удалённым постам и от удалённых пользователей
+    отбрасываются. bulk_create не вызывает сигналы, поэтому счётчики
+    комментариев, Post.updated_at и кеш страниц обновляются здесь, а
+    created_at — время отправки, а не записи — проставляется отдельным
+    bulk_update. Очередь должен разбирать один обработчик. Возвращает
+    число обработанных файлов.
+    """
+    paths = queued_paths()[:batch_size]
+    if not paths:
+        return 0
+    entries = read_entries(paths)
+    post_ids = set(Post.objects.filter(
+        pk__in={entry['post_id'] for entry in entries},
+    ).values_list('pk', flat=True))
+    author_ids = set(get_user_model().objects.filter(
+        pk__in={entry['author_id'] for entry in entries},
+    ).values_list('pk', flat=True))
+    comments = [
+        Comment(
+            post_id=entry['post_id'],
+            author_id=entry['author_id'],
+            text=entry['text'],
+            created_at=parse_datetime(entry['created_at']),
+        )
+        for entry in entries
+        if entry['post_id'] in post_ids and entry['author_id'] in author_ids
+    ]
+    # bulk_create перезапишет created_at временем вставки.
+    sent_at = [comment.created_at for comment in comments]
+    counts = Counter(comment.post_id for comment in comments)
+    now = timezone.now()
+    with transaction.atomic():
+        restore_created_at(Comment.objects.bulk_create(comments), sent_at)
+        for post_id, count in counts.items():
+            Post.objects.filter(pk=post_id).update(
+                comment_count=F('comment_count') + count, updated_at=now)
+    for path in paths:
+        path.unlink(missing_ok=True)
+    if counts:
+        invalidate_pages(FEEDS, *map(post_scope, counts))
+    return len(paths)
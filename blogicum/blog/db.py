@@ -0,0 +1,155 @@
+"""Настройка и учёт соединений с базой данных."""
+import atexit
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .cache import incr_counter
+
+CONNECTION_STATS_KEYS = {
+    'requests': 'blog:db-connections:requests',
+    'opened': 'blog:db-connections:opened',
+    'reused': 'blog:db-connections:reused',
+    'connect_us': 'blog:db-connections:connect-us',
+}
+
+QUERY_STATS_PREFIX = 'blog:queries'
+QUERY_STATS_VIEWS_KEY = f'{QUERY_STATS_PREFIX}:views'
+QUERY_STATS_FIELDS = (
+    'requests', 'queries', 'sql_us', 'duplicates', 'over_budget')
+
+# Как часто процесс добавляет накопленные счётчики к общим в кеше.
+METRICS_FLUSH_SECONDS = 10
+
+_opened = threading.local()
+
+
+class MetricsBuffer:
+    """Счётчики метрик, накопленные процессом.
+
+    Метрики пишутся на каждый запрос, а запись в общий кеш стоит
+    нескольких файловых операций, поэтому счётчики копятся в памяти и
+    добавляются к общим (incr_counter) не чаще раза в interval секунд и
+    при выходе процесса. Отчёты видят метрики всех процессов с
+    отставанием не больше interval.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.counts = Counter()
+        self.views = set()
+        self.flushed_at = time.monotonic()
+
+    def add(self, counts, view_name=None):
+        with self.lock:
+            self.counts.update(counts)
+            if view_name is not None:
+                self.views.add(view_name)
+            due = time.monotonic() - self.flushed_at >= self.interval
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            counts, self.counts = self.counts, Counter()
+            views, self.views = self.views, set()
+            self.flushed_at = time.monotonic()
+        known = cache.get(QUERY_STATS_VIEWS_KEY, set()) if views else set()
+        if not views <= known:
+            cache.set(QUERY_STATS_VIEWS_KEY, known | views, None)
+        for key, value in counts.items():
+            if value:
+                incr_counter(key, value)
+
+
+metrics = MetricsBuffer(METRICS_FLUSH_SECONDS)
+atexit.register(metrics.flush)
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """Применяет BLOG_SQLITE_PRAGMAS к новому соединению.
+
+    Подключается к сигналу connection_created. PRAGMA действуют только
+    в пределах соединения (кроме journal_mode, который сохраняется в
+    файле базы), поэтому выполняются при каждом подключении.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'BLOG_SQLITE_PRAGMAS', {})
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            if not name.isidentifier():
+                raise ValueError(f'Некорректное имя PRAGMA: {name!r}')
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def track_connection_open(sender, connection, **kwargs):
+    """Считает открытые в текущем потоке соединения (connection_created)."""
+    _opened.count = getattr(_opened, 'count', 0) + 1
+
+
+def pop_opened_connections():
+    """Число соединений, открытых потоком с прошлого вызова."""
+    count = getattr(_opened, 'count', 0)
+    _opened.count = 0
+    return count
+
+
+def record_connection_metrics(reused, opened, connect_time):
+    metrics.add({
+        CONNECTION_STATS_KEYS['requests']: 1,
+        CONNECTION_STATS_KEYS['reused']: int(reused),
+        CONNECTION_STATS_KEYS['opened']: opened,
+        CONNECTION_STATS_KEYS['connect_us']: round(connect_time * 1e6),
+    })
+
+
+def get_connection_stats():
+    """Счётчики соединений для мониторинга."""
+    metrics.flush()
+    values = cache.get_many(CONNECTION_STATS_KEYS.values())
+    return {
+        name: values.get(key, 0)
+        for name, key in CONNECTION_STATS_KEYS.items()
+    }
+
+
+def _query_stats_key(view_name, field):
+    return f'{QUERY_STATS_PREFIX}:{view_name}:{field}'
+
+
+def record_query_stats(stats, over_budget):
+    """Добавляет итоги запроса к счётчикам его view."""
+    view_name = stats['view']
+    metrics.add({
+        _query_stats_key(view_name, field): value
+        for field, value in (
+            ('requests', 1),
+            ('queries', stats['queries']),
+            ('sql_us', round(stats['sql_ms'] * 1000)),
+            ('duplicates', stats['duplicates']),
+            ('over_budget', int(over_budget)),
+        )
+    }, view_name)
+
+
+def get_query_stats():
+    """Счётчики запросов к БД по view: {view_name: {поле: значение}}."""
+    metrics.flush()
+    views = sorted(cache.get(QUERY_STATS_VIEWS_KEY, set()))
+    keys = [
+        _query_stats_key(view_name, field)
+        for view_name in views for field in QUERY_STATS_FIELDS
+    ]
+    values = cache.get_many(keys)
+    return {
+        view_name: {
+            field: values.get(_query_stats_key(view_name, field), 0)
+            for field in QUERY_STATS_FIELDS
+        }
+        for view_name in views
+    }
@@ -0,0 +1,174 @@
+"""Наполнение базы синтетическими данными для нагрузочных замеров."""
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from faker import Faker
+
+from .models import Category, Comment, Location, Post
+
+User = get_user_model()
+
+DEFAULT_BATCH_SIZE = 5000
+POSTS_PER_USER = 50
+N_CATEGORIES = 20
+N_LOCATIONS = 50
+PUB_DATE_SPREAD = timedelta(days=3 * 365)
+FUTURE_SPREAD = timedelta(days=30)
+# Тексты собираются из заранее сгенерированных предложений: вызов Faker
+# на каждый пост сделал бы загрузку миллиона строк в разы медленнее.
+SENTENCE_POOL_SIZE = 2000
+# Показатель распределения Парето для числа комментариев: большинство
+# постов почти без комментариев, единицы — с тысячами.
+COMMENT_SKEW = 1.2
+
+
+class FakeDataGenerator:
+    """Детерминированный по ``seed`` генератор данных блога."""
+
+    def __init__(self, seed=0, batch_size=DEFAULT_BATCH_SIZE,
+                 locale='ru_RU', log=None):
+        self.rng = random.Random(seed)
+        self.fake = Faker(locale)
+        self.fake.seed_instance(seed)
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+        self.sentences = [
+            self.fake.sentence() for _ in range(SENTENCE_POOL_SIZE)
+        ]
+
+    def _batches(self, total):
+        while total > 0:
+            size = min(total, self.batch_size)
+            yield size
+            total -= size
+
+    def _text(self, min_sentences, max_sentences):
+        count = self.rng.randint(min_sentences, max_sentences)
+        return ' '.join(self.rng.choices(self.sentences, k=count))
+
+    def _comment_count(self, mean):
+        if not mean:
+            return 0
+        scale = mean * (COMMENT_SKEW - 1) / COMMENT_SKEW
+        return round(self.rng.paretovariate(COMMENT_SKEW) * scale)
+
+    def users(self, total):
+        existing = User.objects.count()
+        password = make_password(None)
+        for size in self._batches(total - existing):
+            with transaction.atomic():
+                User.objects.bulk_create(
+                    User(
+                        username=f'{self.fake.user_name()}{existing + i}',
+                        first_name=self.fake.first_name(),
+                        last_name=self.fake.last_name(),
+                        email=self.fake.email(),
+                        password=password,
+                    )
+                    for i in range(size)
+                )
+            existing += size
+            self.log(f'Пользователей: {existing}')
+        return list(User.objects.values_list('pk', flat=True))
+
+    def categories(self, total, unpublished_ratio):
+        existing = Category.objects.count()
+        Category.objects.bulk_create(
+            Category(
+                title=self.fake.word().capitalize(),
+                description=self._text(1, 3),
+                slug=f'category-{i}',
+                is_published=self.rng.random() >= unpublished_ratio,
+            )
+            for i in range(existing, total)
+        )
+        return list(Category.objects.values_list('pk', flat=True))
+
+    def locations(self, total, unpublished_ratio):
+        existing = Location.objects.count()
+        Location.objects.bulk_create(
+            Location(
+                name=self.fake.city(),
+                is_published=self.rng.random() >= unpublished_ratio,
+            )
+            for _ in range(existing, total)
+        )
+        return list(Location.objects.values_list('pk', flat=True))
+
+    def posts(self, total, user_ids, category_ids, location_ids,
+              comments_per_post, future_ratio, unpublished_ratio):
+        """Доводит число постов до ``total`` вместе с комментариями.
+
+        Post.comment_count, анонс и время чтения заполняются сразу:
+        bulk_create не вызывает save() и сигналы, которые их поддерживают.
+        Первичные ключи постов задаются явно, так как SQLite не возвращает
+        их из bulk_create.
+        """
+        now = timezone.now()
+        past = PUB_DATE_SPREAD.total_seconds()
+        future = FUTURE_SPREAD.total_seconds()
+        # Помеченные удалёнными посты ещё занимают свои id.
+        next_id = (
+            Post.all_objects.aggregate(last=Max('id'))['last'] or 0) + 1
+        created_posts = Post.all_objects.count()
+        for size in self._batches(total - created_posts):
+            posts = []
+            comments = []
+            for post_id in range(next_id, next_id + size):
+                count = self._comment_count(comments_per_post)
+                if self.rng.random() < future_ratio:
+                    offset = -self.rng.uniform(0, future)
+                else:
+                    offset = self.rng.uniform(0, past)
+                post = Post(
+                    id=post_id,
+                    title=self.rng.choice(self.sentences)[:-1],
+                    text=self._text(2, 40),
+                    pub_date=now - timedelta(seconds=offset),
+                    is_published=self.rng.random() >= unpublished_ratio,
+                    author_id=self.rng.choice(user_ids),
+                    category_id=self.rng.choice(category_ids),
+                    location_id=self.rng.choice(location_ids + [None]),
+                    comment_count=count,
+                )
+                post.update_summary()
+                posts.append(post)
+                comments.extend(
+                    Comment(
+                        post_id=post_id,
+                        author_id=self.rng.choice(user_ids),
+                        text=self._text(1, 4),
+                    )
+                    for _ in range(count)
+                )
+            with transaction.atomic():
+                Post.objects.bulk_create(posts)
+                Comment.objects.bulk_create(
+                    comments, batch_size=self.batch_size)
+            next_id += size
+            created_posts += size
+            self.log(f'Постов: {created_posts}')
+
+
+def populate(posts, users=None, categories=N_CATEGORIES,
+             locations=N_LOCATIONS, comments_per_post=2, future_ratio=0.02,
+             unpublished_ratio=0.05, seed=0, batch_size=DEFAULT_BATCH_SIZE,
+             log=None):
+    """Доводит число постов в базе до ``posts``.
+
+    Пользователи, категории и места создаются, только если их меньше
+    запрошенного, поэтому повторный вызов с большим ``posts`` дополняет
+    уже созданные данные.
+    """
+    generator = FakeDataGenerator(seed=seed, batch_size=batch_size, log=log)
+    user_ids = generator.users(users or max(posts // POSTS_PER_USER, 1))
+    category_ids = generator.categories(categories, unpublished_ratio)
+    location_ids = generator.locations(locations, unpublished_ratio)
+    generator.posts(
+        posts, user_ids, category_ids, location_ids,
+        comments_per_post, future_ratio, unpublished_ratio)
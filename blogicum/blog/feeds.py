@@ -0,0 +1,190 @@
+"""Ленты в два шага: упорядоченные id из кеша, затем посты по id.
+
+Список id постов каждой ленты (главная, категория, автор) хранится в
+кеше компактным массивом целых чисел и режется на страницы без
+повторной сортировки в базе. Посты страницы читаются из кеша объектов
+одним get_many, недостающие загружаются одним in_bulk.
+
+Кеши заполняются чтением с основной базы: иначе отставание реплики
+осталось бы в них до истечения срока. Без кеша списков id (срок 0 или
+кеш, не общий для процессов) лента читается обычной страницей
+LIMIT/OFFSET с базы, выбранной роутером.
+"""
+from array import array
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import DEFAULT_DB_ALIAS
+
+from .cache import FEEDS, GLOBAL, invalidate_pages, post_scope, version_key
+from .models import Post
+from .utils import (
+    FeedPaginator,
+    KeysetPaginator,
+    cache_timeout,
+    feed_cache_timeout,
+    feed_count_key,
+    select_post_cards,
+)
+
+IDS_KEY_PREFIX = 'blog:feed-ids'
+POST_KEY_PREFIX = 'blog:post'
+# Сколько первых id ленты хранится в кеше (1000 страниц по 10 постов).
+# Более глубокие страницы выбираются из базы.
+FEED_IDS_LIMIT = 10000
+# Целые со знаком, 8 байт: id не ограничены 32 битами.
+ID_TYPECODE = 'q'
+# Поля, от которых зависит, в какие ленты и на какое место попадает
+# пост. Изменение остальных полей списки id не меняет.
+FEED_FIELDS = (
+    'is_published', 'is_deleted', 'pub_date', 'category_id', 'author_id')
+
+
+def feed_ids_key(feed, pk=None):
+    """Ключ кеша со списком id ленты: index, category или author."""
+    return f'{IDS_KEY_PREFIX}:{feed}:{pk}'
+
+
+def post_key(pk):
+    return f'{POST_KEY_PREFIX}:{pk}'
+
+
+def reset_feeds(*feeds):
+    """Сбрасывает списки id и счётчики лент, заданных парами (лента, pk)."""
+    cache.delete_many({
+        key
+        for feed, pk in feeds
+        for key in (feed_ids_key(feed, pk), feed_count_key(feed, pk))
+    })
+
+
+def feed_state(post):
+    return {name: getattr(post, name) for name in FEED_FIELDS}
+
+
+def post_feeds(*states):
+    """Ленты, в которых выводятся посты с данными состояниями FEED_FIELDS."""
+    feeds = {('index', None)}
+    for state in states:
+        feeds.add(('category', state['category_id']))
+        feeds.add(('author', state['author_id']))
+    return feeds
+
+
+def reset_published_feeds(posts):
+    """Сбрасывает кеши лент, в которые вышли отложенные публикации.
+
+    Пост появляется в ленте с наступлением pub_date, без сохранения
+    модели, так что сигналы о нём не знают: планировщик вызывает сброс
+    сам, и через общий кеш он доходит до веб-процессов.
+    """
+    invalidate_pages(FEEDS, *(post_scope(post.pk) for post in posts))
+    reset_feeds(*post_feeds(*map(feed_state, posts)))
+
+
+def get_feed_ids(queryset, key, timeout):
+    """Первые FEED_IDS_LIMIT id ленты в порядке queryset.
+
+    Список хранится timeout секунд, но не дольше, чем до ближайшей
+    отложенной публикации.
+    """
+    ids = array(ID_TYPECODE)
+    cached = cache.get(key)
+    if cached is not None:
+        ids.frombytes(cached)
+        return ids
+    ids.extend(
+        queryset.using(DEFAULT_DB_ALIAS)
+        .values_list('pk', flat=True)[:FEED_IDS_LIMIT])
+    cache.set(key, ids.tobytes(), feed_cache_timeout(timeout))
+    return ids
+
+
+class FeedIds:
+    """Последовательность id ленты для Paginator.
+
+    Срезы в пределах закешированного массива берутся из него, более
+    глубокие — из базы. Если лента поместилась в массив, её длина и есть
+    число постов; иначе оно считается как в FeedPaginator.
+    """
+
+    def __init__(self, queryset, ids, count_cache_key=None):
+        self.queryset = queryset
+        self.ids = ids
+        self.count_cache_key = count_cache_key
+
+    def count(self):
+        if len(self.ids) < FEED_IDS_LIMIT:
+            return len(self.ids)
+        return FeedPaginator(self.queryset, 1, self.count_cache_key).count
+
+    def __getitem__(self, index):
+        if index.stop is not None and index.stop <= len(self.ids):
+            return self.ids[index].tolist()
+        return list(self.queryset.values_list('pk', flat=True)[index])
+
+
+def get_posts(ids):
+    """Посты с данными карточек в порядке ids.
+
+    Пост из кеша годен, пока не изменились версии post:<id> и global
+    (см. invalidate_pages): их сбрасывают сохранение поста, комментарии,
+    копии изображения, авторы, категории и места. Удалённые посты
+    пропускаются.
+    """
+    ids = list(ids)
+    timeout = cache_timeout('BLOG_POST_CACHE_TIMEOUT')
+    if not timeout:
+        posts = select_post_cards(Post.objects).in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
+
+    # Версии читаются до загрузки постов: пост, изменённый между ними,
+    # сохранится со старой версией и при следующем чтении не подойдёт.
+    global_key = version_key(GLOBAL)
+    scope_keys = {pk: version_key(post_scope(pk)) for pk in ids}
+    cached = cache.get_many(
+        [global_key, *scope_keys.values(), *map(post_key, ids)])
+    versions = {
+        pk: (cached.get(global_key, 0), cached.get(scope_keys[pk], 0))
+        for pk in ids
+    }
+    posts = {}
+    for pk in ids:
+        entry = cached.get(post_key(pk))
+        if entry is not None and entry[0] == versions[pk]:
+            posts[pk] = entry[1]
+    missing = [pk for pk in ids if pk not in posts]
+    if missing:
+        loaded = select_post_cards(
+            Post.objects.using(DEFAULT_DB_ALIAS)).in_bulk(missing)
+        cache.set_many({
+            post_key(pk): (versions[pk], post) for pk, post in loaded.items()
+        }, timeout)
+        posts.update(loaded)
+    return [posts[pk] for pk in ids if pk in posts]
+
+
+def paginate_feed(request, queryset, limit, feed, pk=None):
+    """Страница ленты ``feed`` с постами, готовыми для карточек.
+
+    ``queryset`` — посты ленты в порядке вывода, ``feed`` и ``pk`` —
+    её имя для ключей кеша (см. feed_ids_key).
+    """
+    page_number = request.GET.get('page')
+    if getattr(settings, 'BLOG_KEYSET_PAGINATION', False):
+        return KeysetPaginator(select_post_cards(queryset), limit).get_page(
+            request.GET.get('cursor'))
+    timeout = cache_timeout('BLOG_FEED_IDS_CACHE_TIMEOUT')
+    if not timeout:
+        return FeedPaginator(
+            select_post_cards(queryset), limit, feed_count_key(feed, pk),
+        ).get_page(page_number)
+    ids = FeedIds(
+        queryset,
+        get_feed_ids(queryset, feed_ids_key(feed, pk), timeout),
+        feed_count_key(feed, pk),
+    )
+    page = Paginator(ids, limit).get_page(page_number)
+    page.object_list = get_posts(page.object_list)
+    return page
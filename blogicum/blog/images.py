@@ -0,0 +1,76 @@
+"""Уменьшенные копии изображений постов для адаптивной вёрстки.
+
+Копии создаёт фоновый обработчик (команда process_image_jobs): пока их
+нет, карточка выводит оригинал. Копии лежат в собственном каталоге
+поста VARIANTS_DIR/<post_id>/, куда не попадают загрузки
+пользователей, поэтому пересоздание копий не затрагивает чужие файлы.
+"""
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from .models import ImageJob
+
+VARIANT_WIDTHS = (320, 640, 960)
+# Формат Pillow -> расширение файла копии.
+VARIANT_FORMATS = {'JPEG': 'jpg', 'WEBP': 'webp'}
+VARIANT_QUALITY = 80
+VARIANTS_DIR = 'post_images/variants'
+
+
+def variant_name(post_id, name, width, image_format):
+    """Имя копии: post_images/variants/<post_id>/cat_w320.webp."""
+    stem, _ = os.path.splitext(os.path.basename(name))
+    return (
+        f'{VARIANTS_DIR}/{post_id}/'
+        f'{stem}_w{width}.{VARIANT_FORMATS[image_format]}')
+
+
+def generate_variants(name, post_id, storage=default_storage):
+    """Сохраняет копии изображения всех ширин меньше исходной.
+
+    Возвращает метаданные для Post.image_meta: размеры оригинала и
+    ширины созданных копий. Не обращается к базе данных, поэтому
+    может выполняться в дочернем процессе.
+    """
+    with storage.open(name, 'rb') as fh:
+        original = Image.open(fh)
+        original.load()
+    original = ImageOps.exif_transpose(original)
+    if original.mode not in ('RGB', 'L'):
+        original = original.convert('RGB')
+
+    widths = [width for width in VARIANT_WIDTHS if width < original.width]
+    for width in widths:
+        height = round(original.height * width / original.width)
+        resized = original.resize((width, height), Image.LANCZOS)
+        for image_format in VARIANT_FORMATS:
+            buffer = BytesIO()
+            resized.save(buffer, image_format, quality=VARIANT_QUALITY)
+            copy_name = variant_name(post_id, name, width, image_format)
+            # Прежняя копия того же изображения поста: чужих файлов в
+            # каталоге копий поста нет.
+            if storage.exists(copy_name):
+                storage.delete(copy_name)
+            storage.save(copy_name, ContentFile(buffer.getvalue()))
+    return {
+        'width': original.width,
+        'height': original.height,
+        'variants': widths,
+    }
+
+
+def update_post_image_variants(post):
+    """Пересоздаёт копии изображения поста в текущем процессе."""
+    post.image_meta = (
+        generate_variants(post.image.name, post.pk, post.image.storage)
+        if post.image else {})
+    post.save(update_fields=['image_meta'])
+
+
+def enqueue_image_variants(post):
+    """Ставит создание копий загруженного изображения в очередь."""
+    return ImageJob.objects.create(post=post, image_name=post.image.name)
@@ -0,0 +1,55 @@
+"""Основа фоновых команд блога.
+
+Команды, которые разбирают очередь (комментарии, удаление, изображения,
+отложенные публикации), работают одинаково: обрабатывают пачку за
+пачкой, пока есть работа, а с --loop после пустого прохода засыпают и
+проверяют очередь снова.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+
+class LoopCommand(BaseCommand):
+    """Команда с параметрами --loop и --interval.
+
+    Подкласс реализует run_batch(**options), который обрабатывает одну
+    пачку и возвращает число обработанных объектов, и вызывает run_loop
+    из handle.
+    """
+
+    default_interval = 5
+    interval_type = int
+    loop_help = 'Работать постоянно, проверяя очередь раз в --interval.'
+    interval_help = 'Пауза между проверками пустой очереди в секундах.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true', help=self.loop_help)
+        parser.add_argument(
+            '--interval', type=self.interval_type,
+            default=self.default_interval, help=self.interval_help)
+
+    def run_batch(self, **options):
+        raise NotImplementedError(
+            'Подклассы LoopCommand должны реализовать run_batch().')
+
+    def get_pause(self, interval):
+        """Сколько спать после пустого прохода."""
+        return interval
+
+    def run_loop(self, **options):
+        """Обрабатывает пачки, пока они не кончатся; с --loop — всегда.
+
+        Возвращает общее число обработанных объектов.
+        """
+        processed = 0
+        while True:
+            done = self.run_batch(**options)
+            processed += done
+            if done:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(self.get_pause(options['interval']))
+        return processed
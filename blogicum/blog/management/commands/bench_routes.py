@@ -0,0 +1,241 @@
+import json
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import (
+    CaptureQueriesContext,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.urls import reverse
+from django.utils import timezone
+
+from blog.db import metrics
+from blog.fake_data import populate
+from blog.models import Category, Post
+
+DEFAULT_SCALES = (10_000,)
+DEFAULT_REQUESTS = 30
+ROUTES = (
+    'index',
+    'post_detail',
+    'category_posts',
+    'profile_view',
+    'search',
+    'add_comment',
+    'edit_post',
+)
+
+
+@contextmanager
+def private_cache():
+    """Отдельный файловый кеш на время замера.
+
+    Замер работает с временной базой: её id и посты не должны попасть в
+    кеш запущенного сайта, а записи сайта — в замер. Метрики замера
+    тоже остаются в нём. Кеш остаётся общим для процессов, иначе
+    cache_timeout() отключит кеши лент и постов.
+    """
+    with tempfile.TemporaryDirectory() as location, override_settings(
+        CACHES={
+            'default': {
+                'BACKEND': (
+                    'django.core.cache.backends.filebased.FileBasedCache'),
+                'LOCATION': location,
+                'OPTIONS': {'MAX_ENTRIES': 100000},
+            },
+        },
+    ):
+        cache.clear()
+        try:
+            yield
+        finally:
+            metrics.flush()
+            cache.clear()
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = ('Замеряет время ответа, число SQL-запросов и пик памяти для '
+            'маршрутов blog на синтетических данных во временной базе.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scales', type=int, nargs='+', default=DEFAULT_SCALES,
+            help='Число постов в базе для каждого прогона, по возрастанию.')
+        parser.add_argument(
+            '--requests', type=int, default=DEFAULT_REQUESTS,
+            help='Сколько запросов делать к каждому маршруту.')
+        parser.add_argument(
+            '--comments-per-post', type=int, default=2,
+            help='Среднее число комментариев на пост.')
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Зерно генератора данных и выбора страниц.')
+        parser.add_argument(
+            '--output', default='-',
+            help='Файл для JSON-отчёта; по умолчанию stdout.')
+
+    def handle(self, *args, scales, requests, comments_per_post, seed,
+               output, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0)
+        try:
+            with private_cache():
+                results = []
+                for scale in sorted(scales):
+                    self.stderr.write(
+                        f'Наполнение базы до {scale} постов...')
+                    populate(scale, comments_per_post=comments_per_post,
+                             seed=seed)
+                    results.extend(self.bench_scale(scale, requests, seed))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = json.dumps(
+            {'meta': self.meta(), 'results': results},
+            ensure_ascii=False, indent=2)
+        if output == '-':
+            self.stdout.write(report)
+        else:
+            with open(output, 'w', encoding='utf-8') as fh:
+                fh.write(report)
+
+    def meta(self):
+        try:
+            commit = subprocess.run(
+                ('git', 'rev-parse', 'HEAD'), capture_output=True,
+                text=True, cwd=settings.BASE_DIR, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            'commit': commit,
+            'created_at': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+        }
+
+    def make_requests(self, scale, requests, seed):
+        """Готовит для каждого маршрута список (client, method, url, data)."""
+        rng = random.Random(seed)
+        visible = list(
+            Post.objects
+            .filter(is_published=True, category__is_published=True,
+                    pub_date__lte=timezone.now())
+            .order_by('?')
+            .values_list('pk', 'author_id')[:requests]
+        )
+        slugs = list(
+            Category.objects.filter(is_published=True)
+            .values_list('slug', flat=True))
+        users = get_user_model().objects.in_bulk(
+            {author_id for _, author_id in visible})
+        clients = {}
+
+        def client_for(user_id):
+            if user_id not in clients:
+                clients[user_id] = Client()
+                clients[user_id].force_login(users[user_id])
+            return clients[user_id]
+
+        last_page = max(scale // 10, 1)
+        reader = client_for(visible[0][1])
+        plan = {route: [] for route in ROUTES}
+        for post_id, author_id in visible:
+            page = rng.choice((1, rng.randint(1, last_page)))
+            plan['index'].append(
+                (reader, 'get', reverse('blog:index'), {'page': page}))
+            plan['post_detail'].append(
+                (reader, 'get', reverse('blog:post_detail', args=[post_id]),
+                 {}))
+            plan['category_posts'].append(
+                (reader, 'get',
+                 reverse('blog:category_posts', args=[rng.choice(slugs)]),
+                 {'page': page}))
+            plan['profile_view'].append(
+                (reader, 'get',
+                 reverse('blog:profile', args=[users[author_id].username]),
+                 {}))
+            plan['add_comment'].append(
+                (reader, 'post', reverse('blog:add_comment', args=[post_id]),
+                 {'text': 'Комментарий из замера.'}))
+            post = Post.objects.get(pk=post_id)
+            plan['search'].append(
+                (reader, 'get', reverse('blog:search'),
+                 {'q': post.title.split()[0]}))
+            form_data = {
+                'title': post.title,
+                'text': post.text,
+                'pub_date': post.pub_date.strftime('%Y-%m-%dT%H:%M'),
+                'category': post.category_id,
+                'location': post.location_id or '',
+            }
+            plan['edit_post'].append(
+                (client_for(author_id), 'post',
+                 reverse('blog:edit_post', args=[post_id]), form_data))
+        return plan
+
+    @override_settings(
+        BLOG_PAGE_CACHE_TIMEOUT=0,
+        DEBUG=False,
+        ALLOWED_HOSTS=['testserver'],
+    )
+    def bench_scale(self, scale, requests, seed):
+        results = []
+        for route, calls in self.make_requests(scale, requests, seed).items():
+            timings = []
+            queries = []
+            statuses = set()
+            for client, method, url, data in calls:
+                with CaptureQueriesContext(connection) as ctx:
+                    started = time.perf_counter()
+                    response = getattr(client, method)(url, data)
+                    timings.append(time.perf_counter() - started)
+                queries.append(len(ctx.captured_queries))
+                statuses.add(response.status_code)
+
+            # Память замеряется отдельным запросом: tracemalloc замедляет
+            # выполнение и исказил бы время ответа.
+            client, method, url, data = calls[0]
+            tracemalloc.start()
+            getattr(client, method)(url, data)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            results.append({
+                'scale': scale,
+                'route': route,
+                'requests': len(calls),
+                'p50_ms': round(percentile(timings, 0.5) * 1000, 2),
+                'p95_ms': round(percentile(timings, 0.95) * 1000, 2),
+                'queries_mean': round(statistics.mean(queries), 2),
+                'queries_max': max(queries),
+                'peak_memory_kb': round(peak / 1024, 1),
+                'status_codes': sorted(statuses),
+            })
+            self.stderr.write(
+                f"{scale:>9} {route:<15} p50={results[-1]['p50_ms']}ms "
+                f"p95={results[-1]['p95_ms']}ms "
+                f"queries={results[-1]['queries_mean']}")
+        return results
@@ -0,0 +1,180 @@
+import json
+import multiprocessing
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, connections, transaction
+from django.test import override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from blog.fake_data import populate
+from blog.models import Comment, Post
+from blog.utils import get_published_posts, select_post_cards
+
+from .bench_routes import percentile, private_cache
+
+# Режим «как без настройки»: журнал отката и ожидание блокировки по
+# умолчанию из драйвера sqlite3.
+BASELINE_PRAGMAS = {'journal_mode': 'delete'}
+FEED_PAGE_SIZE = 10
+
+
+class Command(BaseCommand):
+    help = ('Замеряет пропускную способность чтения лент во время пачек '
+            'записи комментариев в файловой базе SQLite с настройками '
+            'BLOG_SQLITE_PRAGMAS и без них.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=2000)
+        parser.add_argument(
+            '--readers', type=int, default=4,
+            help='Потоков, читающих первую страницу ленты.')
+        parser.add_argument(
+            '--writers', type=int, default=2,
+            help='Потоков, пишущих комментарии пачками.')
+        parser.add_argument(
+            '--burst', type=int, default=50,
+            help='Комментариев в одной транзакции писателя.')
+        parser.add_argument(
+            '--pause', type=float, default=0.05,
+            help='Пауза писателя между пачками в секундах.')
+        parser.add_argument(
+            '--duration', type=float, default=5,
+            help='Длительность каждого прогона в секундах.')
+        parser.add_argument(
+            '--output', default='-',
+            help='Файл для JSON-отчёта; по умолчанию stdout.')
+
+    def handle(self, *args, posts, output, **options):
+        setup_test_environment()
+        # Тестовая база SQLite по умолчанию в памяти, а WAL и блокировки
+        # нужны на настоящем файле.
+        tmp_dir = tempfile.TemporaryDirectory()
+        connection.settings_dict['TEST']['NAME'] = str(
+            Path(tmp_dir.name) / 'bench.sqlite3')
+        old_name = connection.creation.create_test_db(verbosity=0)
+        try:
+            with private_cache():
+                self.stderr.write(f'Наполнение базы до {posts} постов...')
+                populate(posts, comments_per_post=0)
+                results = [
+                    self.run_mode('baseline', BASELINE_PRAGMAS, **options),
+                    self.run_mode(
+                        'tuned', settings.BLOG_SQLITE_PRAGMAS, **options),
+                ]
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            tmp_dir.cleanup()
+
+        report = json.dumps({'results': results}, ensure_ascii=False,
+                            indent=2)
+        if output == '-':
+            self.stdout.write(report)
+        else:
+            with open(output, 'w', encoding='utf-8') as fh:
+                fh.write(report)
+
+    def reader(self, stop, results):
+        timings = []
+        errors = 0
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                list(select_post_cards(
+                    get_published_posts())[:FEED_PAGE_SIZE])
+            except OperationalError:
+                errors += 1
+                continue
+            timings.append(time.perf_counter() - started)
+        connections.close_all()
+        results.put(('read', timings, errors))
+
+    def writer(self, stop, results, post_ids, author_id, burst, pause):
+        written = 0
+        errors = 0
+        while not stop.is_set():
+            try:
+                with transaction.atomic():
+                    for post_id in random.sample(post_ids, burst):
+                        Comment.objects.create(
+                            post_id=post_id,
+                            author_id=author_id,
+                            text='Комментарий из замера.',
+                        )
+                written += burst
+            except OperationalError:
+                errors += 1
+            time.sleep(pause)
+        connections.close_all()
+        results.put(('write', written, errors))
+
+    def run_mode(self, mode, pragmas, readers, writers, burst, pause,
+                 duration, **options):
+        post_ids = list(
+            get_published_posts().values_list('pk', flat=True)[:burst * 4])
+        author_id = Post.objects.values_list('author_id', flat=True)[0]
+        # Отдельные процессы, а не потоки: иначе читатели и писатели
+        # упираются в GIL, а не в блокировки SQLite.
+        context = multiprocessing.get_context('fork')
+        stop = context.Event()
+        results = context.Queue()
+        stats = {'reads': [], 'read_errors': 0, 'written': 0,
+                 'write_errors': 0}
+        with override_settings(BLOG_SQLITE_PRAGMAS=pragmas):
+            connections.close_all()
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                journal_mode = cursor.fetchone()[0]
+            # Дочерние процессы открывают свои соединения.
+            connections.close_all()
+            workers = [
+                context.Process(target=self.reader, args=(stop, results))
+                for _ in range(readers)
+            ] + [
+                context.Process(
+                    target=self.writer,
+                    args=(stop, results, post_ids, author_id, burst,
+                          pause))
+                for _ in range(writers)
+            ]
+            for worker in workers:
+                worker.start()
+            time.sleep(duration)
+            stop.set()
+            for _ in workers:
+                kind, value, errors = results.get()
+                if kind == 'read':
+                    stats['reads'].extend(value)
+                    stats['read_errors'] += errors
+                else:
+                    stats['written'] += value
+                    stats['write_errors'] += errors
+            for worker in workers:
+                worker.join()
+
+        reads = stats['reads'] or [0]
+        result = {
+            'mode': mode,
+            'journal_mode': journal_mode,
+            'pragmas': pragmas,
+            'reads_per_s': round(len(stats['reads']) / duration, 1),
+            'read_p50_ms': round(percentile(reads, 0.5) * 1000, 2),
+            'read_p95_ms': round(percentile(reads, 0.95) * 1000, 2),
+            'read_max_ms': round(max(reads) * 1000, 2),
+            'read_errors': stats['read_errors'],
+            'writes_per_s': round(stats['written'] / duration, 1),
+            'write_errors': stats['write_errors'],
+        }
+        self.stderr.write(
+            f"{mode:<8} journal={journal_mode} "
+            f"reads/s={result['reads_per_s']} "
+            f"p95={result['read_p95_ms']}ms "
+            f"max={result['read_max_ms']}ms "
+            f"writes/s={result['writes_per_s']} "
+            f"errors={result['read_errors'] + result['write_errors']}")
+        return result
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from blog.db import get_connection_stats
+from blog.utils import require_shared_cache
+
+
+class Command(BaseCommand):
+    help = ('Показывает, сколько запросов переиспользовали соединение с '
+            'БД и сколько времени ушло на открытие новых.')
+
+    def handle(self, *args, **options):
+        require_shared_cache()
+        stats = get_connection_stats()
+        requests = stats['requests']
+        reuse_ratio = stats['reused'] / requests if requests else 0
+        connect_ms = stats['connect_us'] / 1000
+        per_open = connect_ms / stats['opened'] if stats['opened'] else 0
+        self.stdout.write(
+            f"requests={requests} opened={stats['opened']} "
+            f"reused={stats['reused']} reuse_ratio={reuse_ratio:.2%} "
+            f'connect_ms={connect_ms:.1f} per_open_ms={per_open:.2f}')
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from blog.cache import FEEDS, invalidate_pages, post_scope
+from blog.models import Post
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = ('Заполняет анонс и время чтения постов, созданных до их '
+            'появления или изменённых в обход save().')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help='Сколько публикаций обновлять за одну транзакцию.')
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Пересчитать все посты, а не только без анонса.')
+
+    def handle(self, *args, batch_size, all, **options):
+        posts = Post.objects.order_by('pk').only('pk', 'text')
+        if not all:
+            posts = posts.filter(excerpt='').exclude(text='')
+        filled = 0
+        last_id = 0
+        while True:
+            batch = list(posts.filter(pk__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1].pk
+            now = timezone.now()
+            for post in batch:
+                post.update_summary()
+                # Карточка поста меняется: новая дата сбрасывает её кеш
+                # и ETag лент, как при обычном сохранении.
+                post.updated_at = now
+            with transaction.atomic():
+                Post.objects.bulk_update(
+                    batch, ['excerpt', 'reading_time', 'updated_at'])
+            invalidate_pages(*(post_scope(post.pk) for post in batch))
+            filled += len(batch)
+        if filled:
+            invalidate_pages(FEEDS)
+        self.stdout.write(
+            self.style.SUCCESS(f'Обновлено постов: {filled}'))
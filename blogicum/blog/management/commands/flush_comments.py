@@ -0,0 +1,26 @@
+from blog.comment_queue import flush_comments
+from blog.management.base import LoopCommand
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_INTERVAL = 1
+
+
+class Command(LoopCommand):
+    help = ('Записывает комментарии из очереди BLOG_COMMENT_QUEUE_DIR в '
+            'базу пачками. Запускается в одном экземпляре.')
+    default_interval = DEFAULT_INTERVAL
+    interval_type = float
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help='Сколько комментариев записывать за одну транзакцию.')
+        super().add_arguments(parser)
+
+    def run_batch(self, *, batch_size, **options):
+        return flush_comments(batch_size)
+
+    def handle(self, *args, **options):
+        flushed = self.run_loop(**options)
+        self.stdout.write(
+            self.style.SUCCESS(f'Записано комментариев: {flushed}'))
@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.fake_data import (
+    DEFAULT_BATCH_SIZE,
+    N_CATEGORIES,
+    N_LOCATIONS,
+    populate,
+)
+
+
+class Command(BaseCommand):
+    help = ('Генерирует пользователей, категории, места, посты и '
+            'комментарии для нагрузочного тестирования.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--posts', type=int, default=10_000,
+            help='Сколько постов должно быть в базе.')
+        parser.add_argument(
+            '--users', type=int, default=None,
+            help='Сколько пользователей; по умолчанию один на 50 постов.')
+        parser.add_argument('--categories', type=int, default=N_CATEGORIES)
+        parser.add_argument('--locations', type=int, default=N_LOCATIONS)
+        parser.add_argument(
+            '--comments-per-post', type=float, default=2,
+            help='Среднее число комментариев на пост (распределение '
+                 'с длинным хвостом).')
+        parser.add_argument(
+            '--future-ratio', type=float, default=0.02,
+            help='Доля отложенных публикаций с датой в будущем.')
+        parser.add_argument(
+            '--unpublished-ratio', type=float, default=0.05,
+            help='Доля снятых с публикации постов, категорий и мест.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help='Сколько постов вставлять в одной транзакции.')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        populate(
+            options['posts'],
+            users=options['users'],
+            categories=options['categories'],
+            locations=options['locations'],
+            comments_per_post=options['comments_per_post'],
+            future_ratio=options['future_ratio'],
+            unpublished_ratio=options['unpublished_ratio'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            log=lambda message: self.stdout.write(message),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.monotonic() - started:.1f} с'))
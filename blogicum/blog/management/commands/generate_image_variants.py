@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from blog.images import update_post_image_variants
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = ('Создаёт уменьшенные копии изображений для постов, '
+            'загруженных до появления копий.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Пересоздать копии для всех постов с изображением.')
+
+    def handle(self, *args, all, **options):
+        posts = Post.objects.exclude(image='').exclude(image__isnull=True)
+        if not all:
+            posts = posts.filter(image_meta={})
+        done = 0
+        for post in posts.iterator():
+            try:
+                update_post_image_variants(post)
+            except OSError as error:
+                self.stderr.write(f'Пост {post.pk}: {error}')
+                continue
+            done += 1
+        self.stdout.write(self.style.SUCCESS(f'Обработано постов: {done}'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from blog.cache import get_page_cache_stats
+from blog.utils import require_shared_cache
+
+
+class Command(BaseCommand):
+    help = 'Показывает попадания и промахи кеша страниц для анонимов.'
+
+    def handle(self, *args, **options):
+        require_shared_cache()
+        stats = get_page_cache_stats()
+        total = stats['hits'] + stats['misses']
+        ratio = stats['hits'] / total if total else 0
+        self.stdout.write(
+            f"hits={stats['hits']} misses={stats['misses']} "
+            f'hit_ratio={ratio:.2%}')
@@ -0,0 +1,106 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+
+import django
+from django.db import connections
+from django.db.models import F
+from django.utils import timezone
+from PIL import Image
+
+from blog.cache import FEEDS, invalidate_pages, post_scope
+from blog.images import generate_variants
+from blog.management.base import LoopCommand
+from blog.models import ImageJob, Post
+
+DEFAULT_BATCH_SIZE = 20
+DEFAULT_INTERVAL = 5
+MAX_ATTEMPTS = 3
+# Задание, которое так долго остаётся «в работе», осталось от упавшего
+# обработчика и возвращается в очередь.
+STALE_AFTER = timedelta(minutes=10)
+
+
+class Command(LoopCommand):
+    help = ('Создаёт уменьшенные копии загруженных изображений из очереди '
+            'заданий в пуле процессов.')
+    default_interval = DEFAULT_INTERVAL
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Число процессов для декодирования и масштабирования.')
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help='Сколько заданий брать из очереди за один проход.')
+        super().add_arguments(parser)
+
+    def claim_jobs(self, batch_size):
+        """Переводит задания из очереди в работу.
+
+        Условие status=PENDING в UPDATE не даёт двум обработчикам взять
+        одно задание.
+        """
+        now = timezone.now()
+        ImageJob.objects.filter(
+            status=ImageJob.RUNNING,
+            started_at__lt=now - STALE_AFTER,
+        ).update(status=ImageJob.PENDING)
+        ids = list(
+            ImageJob.objects.filter(status=ImageJob.PENDING)
+            .values_list('pk', flat=True)[:batch_size])
+        ImageJob.objects.filter(pk__in=ids, status=ImageJob.PENDING).update(
+            status=ImageJob.RUNNING,
+            started_at=now,
+            attempts=F('attempts') + 1,
+        )
+        return list(ImageJob.objects.filter(
+            pk__in=ids, status=ImageJob.RUNNING, started_at=now))
+
+    def finish_job(self, job, meta):
+        # Пока задание ждало, автор мог заменить изображение: копии
+        # старого файла посту уже не нужны.
+        updated = Post.objects.filter(
+            pk=job.post_id, image=job.image_name,
+        ).update(image_meta=meta, updated_at=timezone.now())
+        if updated:
+            invalidate_pages(FEEDS, post_scope(job.post_id))
+        job.delete()
+
+    def fail_job(self, job, error):
+        job.status = (
+            ImageJob.FAILED if job.attempts >= MAX_ATTEMPTS
+            else ImageJob.PENDING)
+        job.error = str(error)
+        job.save(update_fields=['status', 'error'])
+        self.stderr.write(f'{job.image_name}: {error}')
+
+    def run_batch(self, *, executor, batch_size, **options):
+        jobs = self.claim_jobs(batch_size)
+        futures = {
+            executor.submit(
+                generate_variants, job.image_name, job.post_id): job
+            for job in jobs
+        }
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                meta = future.result()
+            except (OSError, ValueError, Image.DecompressionBombError) as e:
+                self.fail_job(job, e)
+            else:
+                self.finish_job(job, meta)
+        return len(jobs)
+
+    def handle(self, *args, workers, **options):
+        # Дочерние процессы не работают с базой; соединение родителя
+        # не должно достаться им при fork. Пул запускает все процессы при
+        # первом submit(), поэтому пустое задание отправляется до первого
+        # запроса к базе.
+        connections.close_all()
+        with ProcessPoolExecutor(
+                max_workers=workers, initializer=django.setup) as executor:
+            executor.submit(int).result()
+            processed = self.run_loop(executor=executor, **options)
+        self.stdout.write(
+            self.style.SUCCESS(f'Обработано заданий: {processed}'))
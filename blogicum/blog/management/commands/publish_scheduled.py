@@ -0,0 +1,91 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from blog.feeds import reset_published_feeds
+from blog.management.base import LoopCommand
+from blog.models import Post
+from blog.utils import (
+    KeysetPaginator,
+    cache_timeout,
+    get_next_publication_time,
+    is_shared_cache,
+)
+
+# Отметка хранится в общем кеше рядом со сбрасываемыми лентами. Если
+# её там нет (кеш очищен или вытеснил её), проход начинается на срок
+# жизни самого долгого кеша лент назад: более ранние публикации уже не
+# могут сидеть в закешированных списках и страницах.
+CHECKPOINT_KEY = 'blog:scheduler:checkpoint'
+FEED_CACHE_SETTINGS = (
+    'BLOG_FEED_IDS_CACHE_TIMEOUT',
+    'BLOG_FEED_COUNT_CACHE_TIMEOUT',
+    'BLOG_PAGE_CACHE_TIMEOUT',
+)
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_INTERVAL = 60
+
+
+class Command(LoopCommand):
+    help = ('Выпускает в ленты отложенные публикации, время которых '
+            'наступило, и сбрасывает кеши затронутых лент.')
+    default_interval = DEFAULT_INTERVAL
+    loop_help = 'Работать постоянно, просыпаясь к ближайшей публикации.'
+    interval_help = 'Максимальная пауза между проходами в секундах.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help='Сколько публикаций обрабатывать за один проход.')
+        super().add_arguments(parser)
+
+    def publish_due(self, batch_size, interval):
+        """Находит посты с pub_date в (checkpoint, now] по индексу."""
+        now = timezone.now()
+        lookback = max(
+            interval, *(cache_timeout(name) for name in FEED_CACHE_SETTINGS))
+        checkpoint = cache.get(CHECKPOINT_KEY) or (
+            now - timedelta(seconds=lookback))
+        due_posts = Post.objects.filter(
+            is_published=True,
+            pub_date__gt=checkpoint,
+            pub_date__lte=now,
+        ).only('pub_date', 'author', 'category')
+        paginator = KeysetPaginator(
+            due_posts, batch_size, ordering=('pub_date', 'id'))
+        published = 0
+        cursor = None
+        while True:
+            page = paginator.get_page(cursor)
+            if page:
+                reset_published_feeds(list(page))
+                published += len(page)
+            if not page.has_next():
+                break
+            cursor = page.next_cursor
+        cache.set(CHECKPOINT_KEY, now, None)
+        return published
+
+    def run_batch(self, *, batch_size, interval, **options):
+        published = self.publish_due(batch_size, interval)
+        if published:
+            self.stdout.write(f'Опубликовано постов: {published}')
+        return published
+
+    def get_pause(self, interval):
+        now = timezone.now()
+        next_publication = get_next_publication_time(now)
+        pause = interval
+        if next_publication is not None:
+            pause = min(interval, (next_publication - now).total_seconds())
+        return max(pause, 1)
+
+    def handle(self, *args, **options):
+        if not is_shared_cache():
+            # Кеши лент в каждом процессе свои и отключены (см.
+            # blog.utils.cache_timeout): сбрасывать нечего.
+            self.stderr.write(
+                'Кеш не общий для процессов: публикации видны без сброса.')
+            return
+        self.run_loop(**options)
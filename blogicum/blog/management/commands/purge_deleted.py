@@ -0,0 +1,25 @@
+from blog.management.base import LoopCommand
+from blog.purge import purge_step
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_INTERVAL = 10
+
+
+class Command(LoopCommand):
+    help = ('Удаляет помеченные посты и пользователей вместе с '
+            'комментариями пачками в отдельных транзакциях.')
+    default_interval = DEFAULT_INTERVAL
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help='Сколько комментариев удалять за одну транзакцию.')
+        super().add_arguments(parser)
+
+    def run_batch(self, *, batch_size, **options):
+        return purge_step(batch_size)
+
+    def handle(self, *args, **options):
+        purged = self.run_loop(**options)
+        self.stdout.write(
+            self.style.SUCCESS(f'Удалено объектов: {purged}'))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from blog.db import get_query_stats
+from blog.utils import require_shared_cache
+
+
+class Command(BaseCommand):
+    help = ('Показывает по каждому view среднее число SQL-запросов, время '
+            'SQL, повторы запросов и превышения бюджета.')
+
+    def handle(self, *args, **options):
+        require_shared_cache()
+        self.stdout.write(
+            f'{"view":<28}{"requests":>9}{"queries":>9}{"sql_ms":>9}'
+            f'{"dupes":>7}{"over":>6}')
+        for view_name, stats in get_query_stats().items():
+            requests = stats['requests'] or 1
+            self.stdout.write(
+                f'{view_name:<28}{stats["requests"]:>9}'
+                f'{stats["queries"] / requests:>9.1f}'
+                f'{stats["sql_us"] / requests / 1000:>9.2f}'
+                f'{stats["duplicates"] / requests:>7.1f}'
+                f'{stats["over_budget"]:>6}')
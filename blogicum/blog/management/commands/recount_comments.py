@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F
+
+from blog.cache import FEEDS, invalidate_pages, post_scope
+from blog.models import Post
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает Post.comment_count и исправляет расхождения.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help='Сколько публикаций проверять за одну транзакцию.')
+
+    def handle(self, *args, batch_size, **options):
+        fixed = 0
+        last_id = 0
+        while True:
+            ids = list(
+                Post.objects
+                .filter(pk__gt=last_id)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            last_id = ids[-1]
+            with transaction.atomic():
+                drifted = list(
+                    Post.objects
+                    .filter(pk__in=ids)
+                    .annotate(actual=Count('comment'))
+                    .exclude(comment_count=F('actual'))
+                    .values_list('pk', 'actual')
+                )
+                for post_id, actual in drifted:
+                    Post.objects.filter(pk=post_id).update(
+                        comment_count=actual)
+                    fixed += 1
+            invalidate_pages(*(post_scope(pk) for pk, _ in drifted))
+        if fixed:
+            invalidate_pages(FEEDS)
+        self.stdout.write(
+            self.style.SUCCESS(f'Исправлено счётчиков: {fixed}'))
@@ -0,0 +1,26 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = ('Копирует основную базу SQLite в файлы реплик из '
+            'BLOG_READ_REPLICAS для локальной проверки чтения с реплик.')
+
+    def handle(self, *args, **options):
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != 'sqlite':
+            raise CommandError('Копирование поддерживается только для SQLite.')
+        primary.ensure_connection()
+        for alias in settings.BLOG_READ_REPLICAS:
+            replica = connections[alias]
+            replica.close()
+            # backup() даёт согласованный снимок и при включённом WAL.
+            target = sqlite3.connect(replica.settings_dict['NAME'])
+            try:
+                primary.connection.backup(target)
+            finally:
+                target.close()
+            self.stdout.write(f'{alias}: {replica.settings_dict["NAME"]}')
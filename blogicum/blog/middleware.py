@@ -0,0 +1,183 @@
+"""Middleware приложения blog."""
+import logging
+import random
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connection, connections
+
+from .db import (
+    pop_opened_connections,
+    record_connection_metrics,
+    record_query_stats,
+)
+from .routers import read_replica
+
+PRIMARY_PIN_COOKIE = 'blog_primary_pin'
+
+
+class ConnectionMetricsMiddleware:
+    """Учитывает открытие и переиспользование соединения с БД за запрос.
+
+    Соединение открывается в начале запроса, чтобы замерить время
+    подключения вместе с PRAGMA из configure_sqlite. При
+    BLOG_CONN_HEALTH_CHECKS постоянное соединение сначала проверяется
+    через is_usable() — как CONN_HEALTH_CHECKS в Django 4.1, которого
+    нет в 3.2. Итоги запроса доступны в request.db_connection_metrics.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pop_opened_connections()
+        reused = connection.connection is not None
+        if (
+            reused
+            and getattr(settings, 'BLOG_CONN_HEALTH_CHECKS', False)
+            and not connection.is_usable()
+        ):
+            connection.close()
+            reused = False
+        started = time.perf_counter()
+        connection.ensure_connection()
+        connect_time = 0 if reused else time.perf_counter() - started
+        metrics = request.db_connection_metrics = {
+            'reused': reused,
+            'connect_time': connect_time,
+        }
+
+        response = self.get_response(request)
+
+        metrics['opened'] = pop_opened_connections()
+        record_connection_metrics(
+            reused, metrics['opened'], connect_time)
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """Выбирает реплику для чтения в GET-запросах к view с replica_reads.
+
+    После успешного изменяющего запроса (пост, комментарий, профиль)
+    пользователь на BLOG_REPLICA_PIN_SECONDS закрепляется за основной
+    базой подписанной cookie, чтобы видеть свои изменения, пока реплики
+    их не получили. Выбранная реплика (или None) — в request.read_db.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.read_db = None
+        try:
+            response = self.get_response(request)
+        finally:
+            token = getattr(request, '_read_replica_token', None)
+            if token is not None:
+                read_replica.reset(token)
+        if (
+            getattr(settings, 'BLOG_READ_REPLICAS', ())
+            and request.method not in ('GET', 'HEAD', 'OPTIONS')
+            and response.status_code < 400
+        ):
+            pin_seconds = getattr(settings, 'BLOG_REPLICA_PIN_SECONDS', 0)
+            response.set_signed_cookie(
+                PRIMARY_PIN_COOKIE, '1', max_age=pin_seconds,
+                httponly=True, samesite='Lax')
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        replicas = getattr(settings, 'BLOG_READ_REPLICAS', ())
+        if (
+            not replicas
+            or request.method not in ('GET', 'HEAD')
+            or not getattr(view_func, 'replica_reads', False)
+            or self.is_pinned(request)
+        ):
+            return None
+        request.read_db = random.choice(replicas)
+        request._read_replica_token = read_replica.set(request.read_db)
+        return None
+
+    def is_pinned(self, request):
+        pin_seconds = getattr(settings, 'BLOG_REPLICA_PIN_SECONDS', 0)
+        return request.get_signed_cookie(
+            PRIMARY_PIN_COOKIE, default=None, max_age=pin_seconds,
+        ) is not None
+
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetMiddleware:
+    """Считает SQL-запросы ответа и сверяет их с BLOG_QUERY_BUDGETS.
+
+    Число запросов, суммарное время SQL и число повторов одного и того
+    же SQL (признак N+1) попадают в заголовок Server-Timing, в
+    request.query_stats и в статистику по view (query_budget_report).
+    Превышение бюджета view пишется в лог предупреждением.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        statements = []
+
+        def count_query(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                statements.append((sql, time.perf_counter() - started))
+
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(count_query))
+            response = self.get_response(request)
+
+        match = request.resolver_match
+        view_name = match.view_name if match else None
+        repeats = Counter(sql for sql, _ in statements)
+        stats = request.query_stats = {
+            'view': view_name,
+            'queries': len(statements),
+            'sql_ms': sum(duration for _, duration in statements) * 1000,
+            'duplicates': sum(n - 1 for n in repeats.values()),
+        }
+        over = self.over_budget(stats)
+        if view_name:
+            record_query_stats(stats, over_budget=bool(over))
+        if over:
+            logger.warning(
+                'Превышен бюджет запросов во view %s: %s; повторяется: %s',
+                view_name,
+                ', '.join(over),
+                repeats.most_common(1)[0][0] if stats['duplicates'] else '-',
+            )
+        response['Server-Timing'] = self.server_timing(request, stats)
+        return response
+
+    def over_budget(self, stats):
+        budgets = getattr(settings, 'BLOG_QUERY_BUDGETS', {})
+        budget = budgets.get(stats['view'], budgets.get('*', {}))
+        return [
+            f'{name}={stats[name]:.0f} > {limit}'
+            for name, limit in budget.items()
+            if stats[name] > limit
+        ]
+
+    def server_timing(self, request, stats):
+        metrics = [
+            f'db;dur={stats["sql_ms"]:.1f};'
+            f'desc="{stats["queries"]} queries, '
+            f'{stats["duplicates"]} duplicates"',
+        ]
+        connection_metrics = getattr(request, 'db_connection_metrics', None)
+        if connection_metrics and not connection_metrics['reused']:
+            metrics.append(
+                f'db-connect;dur='
+                f'{connection_metrics["connect_time"] * 1000:.1f}')
+        return ', '.join(metrics)
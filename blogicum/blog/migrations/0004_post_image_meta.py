@@ -0,0 +1,18 @@
+# Generated by Django 3.2.16 on 2026-10-18 19:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0003_post_comment_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_meta',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Размеры исходного изображения и ширины его уменьшенных копий.'),
+        ),
+    ]
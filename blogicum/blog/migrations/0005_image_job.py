@@ -0,0 +1,36 @@
+# Generated by Django 3.2.16 on 2026-10-18 19:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_post_image_meta'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('image_name', models.CharField(max_length=256, verbose_name='Файл изображения')),
+                ('status', models.CharField(choices=[('pending', 'В очереди'), ('running', 'Выполняется'), ('failed', 'Ошибка')], default='pending', max_length=16, verbose_name='Статус')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Попыток')),
+                ('error', models.TextField(blank=True, verbose_name='Ошибка')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Добавлено')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Взято в работу')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='image_jobs', to='blog.post', verbose_name='Пост')),
+            ],
+            options={
+                'verbose_name': 'обработка изображения',
+                'verbose_name_plural': 'Обработка изображений',
+                'ordering': ('id',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='imagejob',
+            index=models.Index(fields=['status', 'id'], name='imagejob_status_idx'),
+        ),
+    ]
@@ -0,0 +1,66 @@
+from django.db import migrations
+
+# Индекс с внешним содержимым: текст хранится только в blog_post, FTS5
+# держит лишь инвертированный индекс. Триггеры срабатывают и на
+# bulk_create/update(), которые не вызывают сигналы Django; изменение
+# остальных колонок (например, comment_count) индекс не трогает.
+# Индекс префиксов из трёх символов ускоряет запросы вида "дом"*.
+CREATE_SQL = (
+    """
+    CREATE VIRTUAL TABLE blog_post_fts USING fts5(
+        title, text,
+        content='blog_post', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='3'
+    )
+    """,
+    """
+    CREATE TRIGGER blog_post_fts_ai AFTER INSERT ON blog_post BEGIN
+        INSERT INTO blog_post_fts(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER blog_post_fts_ad AFTER DELETE ON blog_post BEGIN
+        INSERT INTO blog_post_fts(blog_post_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER blog_post_fts_au AFTER UPDATE OF title, text ON blog_post
+    BEGIN
+        INSERT INTO blog_post_fts(blog_post_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+        INSERT INTO blog_post_fts(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    "INSERT INTO blog_post_fts(blog_post_fts) VALUES ('rebuild')",
+)
+
+DROP_SQL = (
+    'DROP TRIGGER IF EXISTS blog_post_fts_au',
+    'DROP TRIGGER IF EXISTS blog_post_fts_ad',
+    'DROP TRIGGER IF EXISTS blog_post_fts_ai',
+    'DROP TABLE IF EXISTS blog_post_fts',
+)
+
+
+def run_sqlite(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_image_job'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_sqlite(CREATE_SQL), run_sqlite(DROP_SQL)),
+    ]
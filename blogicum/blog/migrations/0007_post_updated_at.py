@@ -0,0 +1,25 @@
+from django.db import migrations, models
+from django.db.models import F
+import django.utils.timezone
+
+
+def fill_updated_at(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    Post.objects.update(updated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_post_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Изменено'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_updated_at, migrations.RunPython.noop),
+    ]
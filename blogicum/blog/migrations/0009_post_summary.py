@@ -0,0 +1,49 @@
+# Generated by Django 3.2.16 on 2026-10-18 19:20
+
+import math
+
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+# Значения Post.update_summary() на момент миграции.
+EXCERPT_WORDS = 10
+EXCERPT_MAX_LENGTH = 256
+WORDS_PER_MINUTE = 200
+BATCH_SIZE = 500
+
+
+def fill_summaries(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    batch = []
+    for post in Post.objects.only('text').iterator(chunk_size=BATCH_SIZE):
+        text = post.text or ''
+        post.excerpt = Truncator(
+            Truncator(text).words(EXCERPT_WORDS, truncate=' …')
+        ).chars(EXCERPT_MAX_LENGTH)
+        post.reading_time = math.ceil(len(text.split()) / WORDS_PER_MINUTE)
+        batch.append(post)
+        if len(batch) == BATCH_SIZE:
+            Post.objects.bulk_update(batch, ['excerpt', 'reading_time'])
+            batch = []
+    Post.objects.bulk_update(batch, ['excerpt', 'reading_time'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_publication_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Начало текста для карточки в ленте.', max_length=256, verbose_name='Анонс'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='reading_time',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Время чтения, мин'),
+        ),
+        migrations.RunPython(fill_summaries, migrations.RunPython.noop),
+    ]
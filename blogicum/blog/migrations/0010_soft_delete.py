@@ -0,0 +1,42 @@
+# Generated by Django 3.2.16 on 2026-10-18 19:30
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('blog', '0009_post_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserDeletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('requested_at', models.DateTimeField(auto_now_add=True, verbose_name='Запрошено')),
+            ],
+            options={
+                'verbose_name': 'удаление пользователя',
+                'verbose_name_plural': 'Удаление пользователей',
+                'ordering': ('id',),
+            },
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='is_deleted',
+            field=models.BooleanField(default=False, editable=False, help_text='Пост скрыт везде и будет удалён вместе с комментариями фоновой командой purge_deleted.', verbose_name='Удалено'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_deleted', True)), fields=['id'], name='post_deleted_idx'),
+        ),
+        migrations.AddField(
+            model_name='userdeletion',
+            name='user',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='deletion', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 3.2.16 on 2026-10-18 20:10
+
+from django.db import migrations
+from django.utils import timezone
+
+
+def enqueue_variant_jobs(apps, schema_editor):
+    """Ставит в очередь пересоздание копий в каталоге копий поста.
+
+    Шаблон строит адреса копий уже в новом каталоге, где их ещё нет,
+    поэтому image_meta очищается: до обработки задания карточка выводит
+    оригинал, как у только что загруженного изображения.
+    """
+    Post = apps.get_model('blog', 'Post')
+    ImageJob = apps.get_model('blog', 'ImageJob')
+    posts = (
+        Post.objects
+        .exclude(image='').exclude(image__isnull=True)
+        .exclude(image_meta={})
+    )
+    ImageJob.objects.bulk_create(
+        (
+            ImageJob(post_id=pk, image_name=image)
+            for pk, image in posts.values_list('pk', 'image')
+        ),
+        batch_size=500,
+    )
+    posts.update(image_meta={}, updated_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_soft_delete'),
+    ]
+
+    operations = [
+        migrations.RunPython(enqueue_variant_jobs, migrations.RunPython.noop),
+    ]
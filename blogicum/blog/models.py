@@ -1,9 +1,15 @@
+import math
+
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.utils.text import Truncator
 
 User = get_user_model()
 CHAR_FIELD_MAX_LENGT = 256
 MAX_LENGTH_STR = 15
+# Анонс повторяет прежний вывод карточки: text|truncatewords:10.
+EXCERPT_WORDS = 10
+WORDS_PER_MINUTE = 200
 
 
 class PublicationModel(models.Model):
@@ -14,11 +20,21 @@ class PublicationModel(models.Model):
     created_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name='Добавлено')
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Изменено')
 
     class Meta:
         abstract = True
 
 
+class PostManager(models.Manager):
+    """Посты без удалённых: их дописывает команда purge_deleted."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_deleted=False)
+
+
 class Post(PublicationModel):
     title = models.CharField(
         max_length=CHAR_FIELD_MAX_LENGT,
@@ -31,6 +47,7 @@ class Post(PublicationModel):
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
+        db_index=False,
         verbose_name='Автор публикации'
     )
     location = models.ForeignKey(
@@ -47,14 +64,84 @@ class Post(PublicationModel):
         verbose_name='Категория'
     )
     image = models.ImageField(upload_to='post_images/', blank=True, null=True)
+    image_meta = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text=('Размеры исходного изображения и ширины его '
+                   'уменьшенных копий.'))
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество комментариев')
+    excerpt = models.CharField(
+        max_length=CHAR_FIELD_MAX_LENGT,
+        default='',
+        blank=True,
+        editable=False,
+        verbose_name='Анонс',
+        help_text='Начало текста для карточки в ленте.')
+    reading_time = models.PositiveSmallIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Время чтения, мин')
+    is_deleted = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name='Удалено',
+        help_text=('Пост скрыт везде и будет удалён вместе с комментариями '
+                   'фоновой командой purge_deleted.'))
+
+    objects = PostManager()
+    all_objects = models.Manager()
 
     class Meta:
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
+        indexes = (
+            # Частичные индексы: SQLite сравнивает булево поле без «= 1»
+            # и не может использовать его как префикс составного индекса.
+            models.Index(
+                fields=('pub_date',),
+                condition=models.Q(is_published=True),
+                name='post_published_pub_date_idx'),
+            models.Index(
+                fields=('category', 'pub_date'),
+                condition=models.Q(is_published=True),
+                name='post_category_pub_date_idx'),
+            models.Index(
+                fields=('author', 'pub_date'),
+                name='post_author_pub_date_idx'),
+            models.Index(
+                fields=('id',),
+                condition=models.Q(is_deleted=True),
+                name='post_deleted_idx'),
+        )
 
     def __str__(self):
         return self.title[:MAX_LENGTH_STR]
 
+    def save(self, *args, update_fields=None, **kwargs):
+        if update_fields is None or 'text' in update_fields:
+            self.update_summary()
+            if update_fields is not None:
+                update_fields = {*update_fields, 'excerpt', 'reading_time'}
+        super().save(*args, update_fields=update_fields, **kwargs)
+
+    def update_summary(self):
+        """Пересчитывает анонс и время чтения по тексту поста.
+
+        Лента выводит только их и не загружает текст целиком. bulk_create()
+        и update() save() не вызывают: после них нужна команда
+        fill_post_summaries.
+        """
+        text = self.text or ''
+        self.excerpt = Truncator(
+            Truncator(text).words(EXCERPT_WORDS, truncate=' …')
+        ).chars(CHAR_FIELD_MAX_LENGT)
+        words = len(text.split())
+        self.reading_time = math.ceil(words / WORDS_PER_MINUTE)
+
 
 class Category(PublicationModel):
     title = models.CharField(
@@ -94,6 +181,7 @@ class Comment(models.Model):
     post = models.ForeignKey(
         Post,
         on_delete=models.CASCADE,
+        db_index=False,
         related_name='comment',
         verbose_name='Пост'
     )
@@ -111,6 +199,85 @@ class Comment(models.Model):
         ordering = ('created_at',)
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = (
+            models.Index(
+                fields=('post', 'created_at'),
+                name='comment_post_created_idx'),
+        )
 
     def __str__(self):
         return self.text[:MAX_LENGTH_STR]
+
+
+class ImageJob(models.Model):
+    """Задание фоновому обработчику на создание копий изображения поста."""
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Ошибка'),
+    )
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='image_jobs',
+        verbose_name='Пост'
+    )
+    image_name = models.CharField(
+        max_length=CHAR_FIELD_MAX_LENGT,
+        verbose_name='Файл изображения')
+    status = models.CharField(
+        max_length=16,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+        verbose_name='Статус')
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток')
+    error = models.TextField(blank=True, verbose_name='Ошибка')
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Добавлено')
+    started_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Взято в работу')
+
+    class Meta:
+        ordering = ('id',)
+        verbose_name = 'обработка изображения'
+        verbose_name_plural = 'Обработка изображений'
+        indexes = (
+            models.Index(
+                fields=('status', 'id'),
+                name='imagejob_status_idx'),
+        )
+
+    def __str__(self):
+        return f'{self.image_name} ({self.status})'
+
+
+class UserDeletion(models.Model):
+    """Пользователь, которого удаляет фоновая команда purge_deleted."""
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='deletion',
+        verbose_name='Пользователь'
+    )
+    requested_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Запрошено')
+
+    class Meta:
+        ordering = ('id',)
+        verbose_name = 'удаление пользователя'
+        verbose_name_plural = 'Удаление пользователей'
+
+    def __str__(self):
+        return str(self.user)
@@ -0,0 +1,114 @@
+"""Удаление постов и пользователей в два шага.
+
+Запрос только помечает объект удалённым — короткая запись, после
+которой он пропадает со всех страниц. Команда purge_deleted затем
+удаляет комментарии и сами объекты пачками по batch_size, каждую в
+своей транзакции, поэтому ни запрос, ни обработчик не держат
+блокировку записи SQLite подолгу.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .cache import FEEDS, invalidate_pages, post_scope
+from .feeds import reset_feeds
+from .models import Comment, Post, UserDeletion
+from .signals import suspend_comment_signals
+
+
+def soft_delete_post(post):
+    """Скрывает пост; комментарии удалит purge_deleted."""
+    post.is_deleted = True
+    post.save(update_fields=['is_deleted', 'updated_at'])
+
+
+def soft_delete_user(user):
+    """Блокирует пользователя, скрывает его посты, профиль и комментарии.
+
+    Посты помечаются одним UPDATE без сигналов, поэтому затронутые
+    ленты сбрасываются здесь. У постов с его комментариями меняется
+    updated_at: по нему проверяется Last-Modified страницы поста.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        user.is_active = False
+        user.save(update_fields=['is_active'])
+        posts = Post.objects.filter(author=user)
+        category_ids = set(
+            posts.values_list('category_id', flat=True).distinct())
+        posts.update(is_deleted=True, updated_at=now)
+        Post.objects.filter(pk__in=Comment.objects.filter(
+            author=user).values('post_id')).update(updated_at=now)
+        UserDeletion.objects.get_or_create(user=user)
+    reset_feeds(
+        ('index', None),
+        ('author', user.pk),
+        *(('category', pk) for pk in category_ids),
+    )
+    invalidate_pages(FEEDS)
+
+
+def purge_comments(comments, batch_size, recount=False):
+    """Удаляет одну пачку комментариев из ``comments``.
+
+    Сигналы комментариев на это время отключены. При ``recount``
+    счётчики постов уменьшаются одним UPDATE на пост в той же
+    транзакции. Возвращает число удалённых комментариев.
+    """
+    with suspend_comment_signals(), transaction.atomic():
+        batch = list(
+            comments.order_by('pk').values_list('pk', 'post_id')[:batch_size])
+        if not batch:
+            return 0
+        Comment.objects.filter(pk__in=[pk for pk, _ in batch]).delete()
+        counts = Counter(post_id for _, post_id in batch)
+        if recount:
+            now = timezone.now()
+            for post_id, count in counts.items():
+                Post.objects.filter(pk=post_id).update(
+                    comment_count=Greatest(F('comment_count') - count, 0),
+                    updated_at=now)
+    if recount:
+        invalidate_pages(FEEDS, *map(post_scope, counts))
+    return len(batch)
+
+
+def purge_post(post, batch_size):
+    """Удаляет пачку комментариев поста, а когда их нет — сам пост."""
+    deleted = purge_comments(post.comment.all(), batch_size)
+    if deleted:
+        return deleted
+    post.delete()
+    return 1
+
+
+def purge_user(user, batch_size):
+    """Удаляет пачку комментариев пользователя, а когда их нет — его."""
+    # Посты, появившиеся после soft_delete_user, удаляются как и прочие.
+    marked = Post.objects.filter(author=user).update(is_deleted=True)
+    if marked:
+        return marked
+    deleted = purge_comments(
+        Comment.objects.filter(author=user), batch_size, recount=True)
+    if deleted:
+        return deleted
+    user.delete()
+    return 1
+
+
+def purge_step(batch_size):
+    """Одна ограниченная порция удаления; 0 — удалять больше нечего.
+
+    Сначала дочищаются помеченные посты, в том числе посты удаляемых
+    пользователей, затем сами пользователи.
+    """
+    post = Post.all_objects.filter(is_deleted=True).order_by('pk').first()
+    if post is not None:
+        return purge_post(post, batch_size)
+    deletion = UserDeletion.objects.select_related('user').first()
+    if deletion is not None:
+        return purge_user(deletion.user, batch_size)
+    return 0
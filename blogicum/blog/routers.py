@@ -0,0 +1,48 @@
+"""Маршрутизация чтения на реплики базы данных.
+
+Чтение уходит на реплику (BLOG_READ_REPLICAS) только внутри view,
+помеченных replica_reads, и только если ReplicaRoutingMiddleware выбрала
+для запроса реплику. Всё остальное, включая любую запись, идёт в
+default.
+"""
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Псевдоним реплики, выбранной для текущего запроса, или None.
+read_replica = ContextVar('read_replica', default=None)
+
+# Сессии и пользователи читаются с основной базы: сразу после входа
+# реплика может ещё не знать о новой сессии.
+PRIMARY_ONLY_APPS = {'sessions', 'auth'}
+
+
+def replica_reads(view):
+    """Помечает view, которому достаточно данных с реплики."""
+    view.replica_reads = True
+    return view
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        alias = read_replica.get()
+        if (
+            alias is None
+            or model._meta.app_label in PRIMARY_ONLY_APPS
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики — копии основной базы, связи между ними допустимы.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема и данные попадают на реплики вместе с копией базы.
+        return db not in getattr(settings, 'BLOG_READ_REPLICAS', ())
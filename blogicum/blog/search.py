@@ -0,0 +1,167 @@
+"""Полнотекстовый поиск по постам через SQLite FTS5 (blog_post_fts).
+
+Поиск идёт в два шага: один запрос по FTS-индексу, соединённому с
+постами, отбирает видимые совпадения, ранжирует их все по bm25() и
+возвращает MAX_RESULTS лучших id, а карточки и фрагменты текста
+загружаются только для постов страницы.
+"""
+import re
+
+from django.core.paginator import Paginator
+from django.db import connection, connections
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .feeds import get_posts
+from .utils import get_published_posts
+
+FTS_TABLE = 'blog_post_fts'
+# Вес совпадений в заголовке и в тексте для bm25().
+TITLE_WEIGHT = 10.0
+TEXT_WEIGHT = 1.0
+# Сколько лучших результатов можно пролистать: дальше страницы поиска
+# не нужны. Ранжируются при этом все совпадения.
+MAX_RESULTS = 500
+SNIPPET_TOKENS = 16
+MAX_QUERY_TERMS = 8
+# Совпадает с prefix='3' индекса: более короткий префикс раскрывается в
+# тысячи слов и читает заметную часть индекса.
+MIN_PREFIX_LENGTH = 3
+# snippet() обрамляет совпадения управляющими символами, а <mark>
+# подставляется вместо них уже после экранирования HTML.
+MATCH_START = '\x02'
+MATCH_END = '\x03'
+
+TERM_RE = re.compile(r'\w+')
+MATCH_RE = re.compile('\x02([^\x02\x03]*)\x03')
+
+# Те же триггеры, что создаёт миграция 0006_post_search. SQLite удаляет
+# их вместе с таблицей, а миграции, меняющие blog_post, пересоздают её.
+TRIGGERS_SQL = {
+    'blog_post_fts_ai': f"""
+        CREATE TRIGGER IF NOT EXISTS blog_post_fts_ai
+        AFTER INSERT ON blog_post BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, title, text)
+            VALUES (new.id, new.title, new.text);
+        END
+    """,
+    'blog_post_fts_ad': f"""
+        CREATE TRIGGER IF NOT EXISTS blog_post_fts_ad
+        AFTER DELETE ON blog_post BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, text)
+            VALUES ('delete', old.id, old.title, old.text);
+        END
+    """,
+    'blog_post_fts_au': f"""
+        CREATE TRIGGER IF NOT EXISTS blog_post_fts_au
+        AFTER UPDATE OF title, text ON blog_post BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, text)
+            VALUES ('delete', old.id, old.title, old.text);
+            INSERT INTO {FTS_TABLE}(rowid, title, text)
+            VALUES (new.id, new.title, new.text);
+        END
+    """,
+}
+SNIPPETS_SQL = f"""
+    SELECT rowid, snippet({FTS_TABLE}, 1, %s, %s, '…', %s)
+    FROM {FTS_TABLE}
+    WHERE {FTS_TABLE} MATCH %s AND rowid IN ({{}})
+"""
+
+
+def ensure_search_triggers(using='default', **kwargs):
+    """Восстанавливает триггеры индекса после migrate (сигнал post_migrate).
+
+    Если триггеров не было, индекс перестраивается: изменения постов
+    за это время в него не попали.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' "
+            "AND name = %s", [FTS_TABLE])
+        if cursor.fetchone() is None:
+            return
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+            "AND tbl_name = 'blog_post'")
+        existing = {row[0] for row in cursor.fetchall()}
+        if existing >= TRIGGERS_SQL.keys():
+            return
+        for sql in TRIGGERS_SQL.values():
+            cursor.execute(sql)
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def build_match_query(query):
+    """Переводит строку из формы поиска в выражение MATCH.
+
+    Каждое слово берётся в кавычки (синтаксис FTS5 из ввода не
+    применяется), последнее достаточно длинное ищется по префиксу;
+    слова объединяются через AND.
+    """
+    terms = TERM_RE.findall(query)[:MAX_QUERY_TERMS]
+    match = [f'"{term}"' for term in terms]
+    if terms and len(terms[-1]) >= MIN_PREFIX_LENGTH:
+        match[-1] += '*'
+    return ' '.join(match)
+
+
+def highlight(snippet):
+    """Экранирует фрагмент текста и выделяет совпадения тегом <mark>.
+
+    Непарные маркеры, если они всё же попали в текст поста, удаляются.
+    """
+    text = MATCH_RE.sub(r'<mark>\1</mark>', escape(snippet))
+    return mark_safe(text.replace(MATCH_START, '').replace(MATCH_END, ''))
+
+
+def search_post_ids(match):
+    """Идентификаторы видимых постов по MATCH, от наиболее релевантных.
+
+    Видимость проверяется в том же запросе, что и ранжирование, поэтому
+    в MAX_RESULTS попадают лучшие из видимых постов.
+    """
+    return list(
+        get_published_posts()
+        .extra(
+            select={'score': f'bm25({FTS_TABLE}, %s, %s)'},
+            select_params=[TITLE_WEIGHT, TEXT_WEIGHT],
+            tables=[FTS_TABLE],
+            where=[
+                f'{FTS_TABLE}.rowid = blog_post.id',
+                f'{FTS_TABLE} MATCH %s',
+            ],
+            params=[match],
+        )
+        .order_by('score', '-pk')
+        .values_list('pk', flat=True)[:MAX_RESULTS])
+
+
+def get_snippets(match, ids):
+    if not ids:
+        return {}
+    sql = SNIPPETS_SQL.format(', '.join(['%s'] * len(ids)))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            sql, [MATCH_START, MATCH_END, SNIPPET_TOKENS, match, *ids])
+        return {pk: highlight(snippet) for pk, snippet in cursor.fetchall()}
+
+
+def get_search_page(query, page_number, per_page):
+    """Страница результатов поиска с карточками постов.
+
+    Видимость та же, что у get_published_posts(); у каждого поста есть
+    атрибут search_snippet с подсвеченным фрагментом текста.
+    """
+    match = build_match_query(query)
+    ids = search_post_ids(match) if match else []
+    page = Paginator(ids, per_page).get_page(page_number)
+    snippets = get_snippets(match, page.object_list)
+    page.object_list = get_posts(page.object_list)
+    for post in page.object_list:
+        post.search_snippet = snippets.get(post.pk, '')
+    return page
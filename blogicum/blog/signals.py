@@ -0,0 +1,146 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import FEEDS, GLOBAL, invalidate_pages, post_scope
+from .feeds import FEED_FIELDS, feed_state, post_feeds, reset_feeds
+from .models import Category, Comment, Location, Post
+from .utils import NEXT_PUBLICATION_KEY
+
+# Пока установлен, удаление комментариев не трогает счётчики и кеш
+# страниц: purge_deleted удаляет их пачками и обновляет всё сам.
+comment_signals_suspended = ContextVar(
+    'comment_signals_suspended', default=False)
+
+
+@contextmanager
+def suspend_comment_signals():
+    token = comment_signals_suspended.set(True)
+    try:
+        yield
+    finally:
+        comment_signals_suspended.reset(token)
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, raw, **kwargs):
+    """Увеличивает счётчик комментариев поста при добавлении комментария.
+
+    Любое изменение комментария обновляет и Post.updated_at: по нему
+    проверяется актуальность страницы поста (ETag, Last-Modified).
+    При загрузке фикстур (raw) счётчик уже есть в данных поста.
+    """
+    if raw:
+        return
+    changes = {'updated_at': timezone.now()}
+    if created:
+        changes['comment_count'] = F('comment_count') + 1
+    Post.objects.filter(pk=instance.post_id).update(**changes)
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, **kwargs):
+    """Уменьшает счётчик комментариев поста при удалении комментария.
+
+    Срабатывает и для удаления из админки, и для QuerySet.delete(),
+    и для каскадного удаления.
+    """
+    if comment_signals_suspended.get():
+        return
+    Post.objects.filter(pk=instance.post_id).update(
+        comment_count=Greatest(F('comment_count') - 1, 0),
+        updated_at=timezone.now())
+
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_save, sender=Category)
+@receiver(pre_save, sender=Location)
+def fill_loaded_fields(sender, instance, raw, **kwargs):
+    """Заполняет вычисляемые поля объектов из фикстур.
+
+    loaddata сохраняет объекты в обход save() и auto_now, а в старых
+    фикстурах (db.json) нет updated_at, анонса и времени чтения.
+    """
+    if not raw:
+        return
+    if instance.updated_at is None:
+        instance.updated_at = instance.created_at
+    if sender is Post:
+        instance.update_summary()
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_feeds(sender, instance, raw, using, **kwargs):
+    """Запоминает, в каких лентах пост был до сохранения.
+
+    Перенос в другую категорию меняет и старую ленту, а правка текста
+    не меняет ни одной.
+    """
+    if raw or instance.pk is None:
+        return
+    instance._saved_feed_state = (
+        Post.objects.using(using).filter(pk=instance.pk)
+        .values(*FEED_FIELDS).first())
+
+
+@receiver(post_save, sender=Post)
+def reset_post_feeds(sender, instance, **kwargs):
+    """Сбрасывает списки id и счётчики лент, состав которых изменился."""
+    saved = getattr(instance, '_saved_feed_state', None)
+    state = feed_state(instance)
+    if saved == state:
+        return
+    cache.delete(NEXT_PUBLICATION_KEY)
+    states = [state] if saved is None else [state, saved]
+    reset_feeds(*post_feeds(*states))
+
+
+@receiver(post_delete, sender=Post)
+def reset_deleted_post_feeds(sender, instance, **kwargs):
+    cache.delete(NEXT_PUBLICATION_KEY)
+    reset_feeds(*post_feeds(feed_state(instance)))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def reset_category_feeds(sender, instance, **kwargs):
+    """Снятие категории с публикации меняет состав лент."""
+    reset_feeds(('index', None), ('category', instance.pk))
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_pages(sender, instance, **kwargs):
+    invalidate_pages(FEEDS, post_scope(instance.pk))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_pages(sender, instance, **kwargs):
+    """Комментарий меняет страницу поста и счётчик в карточках ленты."""
+    if comment_signals_suspended.get():
+        return
+    invalidate_pages(FEEDS, post_scope(instance.post_id))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def invalidate_all_pages(sender, instance, **kwargs):
+    invalidate_pages(GLOBAL)
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_author_pages(sender, instance, update_fields=None, **kwargs):
+    """Имя автора выводится в карточках; вход в систему его не меняет."""
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    invalidate_pages(GLOBAL)
@@ -0,0 +1,39 @@
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import get_template
+from django.utils.html import format_html_join
+from django.utils.safestring import mark_safe
+
+from blog.cache import post_card_key
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_cards(posts):
+    """Карточки постов страницы ленты.
+
+    HTML каждой карточки кешируется по post_card_key; все карточки
+    страницы читаются из кеша одним get_many, недостающие отрисовываются
+    и сохраняются одним set_many.
+    """
+    card_template = get_template('includes/post_card.html')
+    timeout = getattr(settings, 'BLOG_CARD_CACHE_TIMEOUT', 0)
+    posts = list(posts)
+    if not timeout:
+        cards = [card_template.render({'post': post}) for post in posts]
+    else:
+        keys = [post_card_key(post) for post in posts]
+        cached = cache.get_many(keys)
+        rendered = {
+            key: card_template.render({'post': post})
+            for key, post in zip(keys, posts)
+            if key not in cached
+        }
+        if rendered:
+            cache.set_many(rendered, timeout)
+        cards = [cached.get(key) or rendered[key] for key in keys]
+    return format_html_join(
+        '\n', '<article class="mb-5">{}</article>',
+        ((mark_safe(card),) for card in cards))
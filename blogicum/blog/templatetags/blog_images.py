@@ -0,0 +1,42 @@
+from django import template
+
+from blog.images import variant_name
+
+register = template.Library()
+
+# Карточка поста шириной 40rem.
+DEFAULT_SIZES = '(max-width: 640px) 100vw, 640px'
+
+
+@register.inclusion_tag('includes/post_image.html')
+def post_image(post, css_class='', sizes=DEFAULT_SIZES):
+    """Изображение поста с srcset из уменьшенных копий.
+
+    Пока копий нет (или исходник меньше самой маленькой копии), выводится
+    только оригинал.
+    """
+    image = post.image
+    meta = post.image_meta
+    widths = meta.get('variants', [])
+    srcsets = {}
+    for image_format in ('JPEG', 'WEBP'):
+        srcsets[image_format] = ', '.join(
+            '{} {}w'.format(
+                image.storage.url(
+                    variant_name(
+                        post.pk, image.name, width, image_format)),
+                width,
+            )
+            for width in widths
+        )
+    if widths:
+        srcsets['JPEG'] += f", {image.url} {meta['width']}w"
+    return {
+        'src': image.url,
+        'width': meta.get('width'),
+        'height': meta.get('height'),
+        'jpeg_srcset': srcsets['JPEG'],
+        'webp_srcset': srcsets['WEBP'],
+        'sizes': sizes,
+        'css_class': css_class,
+    }
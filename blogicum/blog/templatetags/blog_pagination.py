@@ -0,0 +1,19 @@
+from django import template
+
+register = template.Library()
+
+# Соседних страниц по обе стороны от текущей и страниц в начале и в
+# конце списка.
+ON_EACH_SIDE = 2
+ON_ENDS = 1
+
+
+@register.simple_tag
+def elided_page_range(page_obj):
+    """Номера страниц вокруг текущей, первые и последние.
+
+    Пропуски обозначены Paginator.ELLIPSIS. Полный page_range не
+    создаётся, поэтому число ссылок не зависит от размера ленты.
+    """
+    return page_obj.paginator.get_elided_page_range(
+        page_obj.number, on_each_side=ON_EACH_SIDE, on_ends=ON_ENDS)
@@ -12,8 +12,10 @@ from .views import (
     index,
     logout_view,
     post_delete,
+    post_comments,
     post_detail,
     profile_view,
+    search,
 )
 
 
@@ -27,10 +29,13 @@ urlpatterns = [
     path('category/<slug:category_slug>/', category_posts,
          name='category_posts'),
     path('posts/create/', create_post, name='create_post'),
+    path('search/', search, name='search'),
     path('profile/edit/', edit_profile, name='edit_profile'),
     path('profile/<str:username>/', profile_view, name='profile'),
     path('auth/logout/', logout_view, name='logout'),
     path('posts/<int:post_id>/comment/', add_comment, name='add_comment'),
+    path('posts/<int:post_id>/comments/', post_comments,
+         name='post_comments'),
     path(
         'posts/<int:post_id>/edit_comment/<int:comment_id>/',
         edit_comment,
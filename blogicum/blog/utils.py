@@ -1,20 +1,328 @@
-from django.db.models import Count
-from django.utils import timezone
+import base64
+import binascii
+import json
+import math
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError
 from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.functional import cached_property
 
-from .models import Post
+from .models import Comment, Post
 
+FEED_ORDERING = ('-pub_date', '-id')
+# Поля, которые выводит includes/post_card.html: остальные колонки
+# (полный текст поста, профиль автора, описание категории и т.п.) в
+# ленте не нужны — вместо текста карточка выводит сохранённый анонс.
+POST_CARD_FIELDS = (
+    'title',
+    'excerpt',
+    'reading_time',
+    'pub_date',
+    'is_published',
+    'image',
+    'image_meta',
+    'comment_count',
+    'updated_at',
+    'author__username',
+    'category__title',
+    'category__slug',
+    'category__is_published',
+    'category__updated_at',
+    'location__name',
+    'location__is_published',
+    'location__updated_at',
+)
 
-def get_published_posts():
-    """Views функция возвращает опубликованные посты."""
-    return Post.objects.filter(
+
+def published_posts_q():
+    """Условие видимости поста для всех посетителей."""
+    return Q(
         is_published=True,
         category__is_published=True,
         pub_date__lte=timezone.now()
-    ).annotate(comment_count=Count('comment')).order_by('-pub_date')
+    )
+
+
+def get_published_posts():
+    """Views функция возвращает опубликованные посты."""
+    return Post.objects.filter(published_posts_q()).order_by(*FEED_ORDERING)
+
+
+def get_visible_posts(user):
+    """Посты, которые пользователь может открыть: свои или опубликованные.
+
+    Проверка авторства идёт по author_id и не требует загрузки автора.
+    """
+    return Post.objects.filter(Q(author_id=user.id) | published_posts_q())
+
+
+def get_visible_post_detail(user):
+    """Видимые посты вместе с автором, категорией и местом."""
+    return get_visible_posts(user).select_related(
+        'author', 'category', 'location')
+
+
+NEXT_PUBLICATION_KEY = 'blog:next-publication'
+
+
+def get_next_publication_time(now=None):
+    """Дата ближайшей отложенной публикации или None.
+
+    Результат кешируется до наступления этой даты; сигналы сохранения
+    и удаления постов сбрасывают его.
+    """
+    now = now or timezone.now()
+    cached = cache.get(NEXT_PUBLICATION_KEY)
+    if cached is not None and (cached == 'none' or cached > now):
+        return None if cached == 'none' else cached
+    next_publication = (
+        Post.objects
+        .filter(is_published=True, pub_date__gt=now)
+        .order_by('pub_date')
+        .values_list('pub_date', flat=True)
+        .first()
+    )
+    if next_publication is None:
+        cache.set(NEXT_PUBLICATION_KEY, 'none', None)
+    else:
+        cache.set(NEXT_PUBLICATION_KEY, next_publication, math.ceil(
+            (next_publication - now).total_seconds()))
+    return next_publication
+
+
+def is_shared_cache():
+    """Виден ли кеш по умолчанию другим процессам.
+
+    LocMemCache и DummyCache у каждого процесса свои: сброс версий из
+    команды или соседнего воркера до них не доходит, а счётчики метрик
+    в них видит только сам процесс.
+    """
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+def require_shared_cache():
+    """Прерывает команду, которой нужны данные веб-процессов из кеша."""
+    if not is_shared_cache():
+        raise CommandError(
+            'Кеш не общий для процессов: счётчики и метрики веб-процессов '
+            'недоступны. Настройте CACHES (см. settings.py).')
+
+
+def cache_timeout(setting_name):
+    """Срок кеша из настройки; 0, если кеш не общий для процессов.
+
+    Для кешей, которые сбрасываются из других процессов: страниц,
+    списков id и счётчиков лент, постов.
+    """
+    if not is_shared_cache():
+        return 0
+    return getattr(settings, setting_name, 0)
+
+
+def feed_cache_timeout(timeout):
+    """Ограничивает время жизни кеша ленты ближайшей публикацией.
+
+    Отложенный пост появляется в ленте без сохранения модели, поэтому
+    сигналы о нём не узнают: кеш должен истечь к моменту его выхода.
+    """
+    now = timezone.now()
+    next_publication = get_next_publication_time(now)
+    if next_publication is None:
+        return timeout
+    seconds = math.ceil((next_publication - now).total_seconds())
+    return max(1, min(timeout, seconds))
+
+
+def select_post_cards(queryset):
+    """Подгружает одним JOIN всё, что нужно карточке поста в ленте."""
+    return queryset.select_related(
+        'author', 'category', 'location'
+    ).only(*POST_CARD_FIELDS)
+
+
+def get_author_posts(author):
+    """Все публикации автора для страницы профиля."""
+    return Post.objects.filter(author=author).order_by(*FEED_ORDERING)
+
+
+COMMENT_ORDERING = ('created_at', 'id')
+LIMIT_COMMENTS_COUNT = 50
+
+
+def get_post_comments(post):
+    """Комментарии к публикации в порядке добавления.
+
+    Комментарии удаляемых пользователей скрыты сразу, удаляет их
+    purge_deleted.
+    """
+    return Comment.objects.filter(
+        post=post, author__deletion__isnull=True,
+    ).order_by(*COMMENT_ORDERING)
+
+
+def get_comments_page(post, cursor, limit=LIMIT_COMMENTS_COUNT):
+    """Порция комментариев после курсора вместе с их авторами."""
+    comments = get_post_comments(post).select_related('author')
+    return KeysetPaginator(
+        comments, limit, ordering=COMMENT_ORDERING).get_page(cursor)
+
+
+class KeysetPage:
+    """Страница курсорной пагинации.
+
+    Повторяет ту часть интерфейса Page, которая нужна шаблонам,
+    но вместо номеров страниц отдаёт непрозрачные курсоры.
+    """
+
+    is_keyset = True
+
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """Пагинация по ключу сортировки вместо OFFSET.
+
+    Каждая страница выбирается условием «строго после (до) курсора»
+    по полям ``ordering``, поэтому время выборки не зависит от глубины
+    страницы и не требует COUNT(*). Последнее поле ``ordering`` должно
+    быть уникальным (обычно ``id``).
+    """
+
+    def __init__(self, queryset, per_page, ordering=FEED_ORDERING):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = ordering
+        self.fields = [name.lstrip('-') for name in ordering]
+
+    def encode_cursor(self, obj, direction):
+        values = [str(getattr(obj, name)) for name in self.fields]
+        raw = json.dumps([direction, values]).encode()
+        return base64.urlsafe_b64encode(raw).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            direction, values = json.loads(base64.urlsafe_b64decode(
+                cursor.encode()))
+            if direction not in ('next', 'prev'):
+                raise ValueError
+            if len(values) != len(self.fields):
+                raise ValueError
+            model_meta = self.queryset.model._meta
+            values = [
+                model_meta.get_field(name).to_python(value)
+                for name, value in zip(self.fields, values)
+            ]
+            # to_python(None) возвращает None, а сравнивать с NULL
+            # курсор не может.
+            if None in values:
+                raise ValueError
+            return direction, values
+        except (binascii.Error, TypeError, ValueError, ValidationError):
+            return None, None
+
+    def _after(self, values, reverse):
+        """Условие «строго после курсора» в порядке сортировки."""
+        condition = Q()
+        for index, name in enumerate(self.ordering):
+            descending = name.startswith('-') != reverse
+            lookup = 'lt' if descending else 'gt'
+            field = name.lstrip('-')
+            step = Q(**{f'{field}__{lookup}': values[index]})
+            for prev_field, value in zip(self.fields[:index], values):
+                step &= Q(**{prev_field: value})
+            condition |= step
+        return condition
+
+    def get_page(self, cursor):
+        direction, values = (
+            self.decode_cursor(cursor) if cursor else (None, None)
+        )
+        reverse = direction == 'prev'
+        ordering = self.ordering
+        if reverse:
+            ordering = [
+                name[1:] if name.startswith('-') else f'-{name}'
+                for name in self.ordering
+            ]
+        queryset = self.queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self._after(values, reverse))
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if reverse:
+            rows.reverse()
+        if not rows:
+            return KeysetPage(rows, None, None)
+        if reverse:
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, values is not None
+        return KeysetPage(
+            rows,
+            self.encode_cursor(rows[-1], 'next') if has_next else None,
+            self.encode_cursor(rows[0], 'prev') if has_previous else None,
+        )
+
+
+def feed_count_key(feed, pk=None):
+    """Ключ кеша с числом публикаций ленты: index, category или author."""
+    return f'blog:feed-count:{feed}:{pk}'
+
+
+class FeedPaginator(Paginator):
+    """Paginator, считающий публикации ленты без JOIN-ов карточек.
+
+    COUNT(*) выполняется по фильтру ленты без сортировки (JOIN-ы
+    select_related в подсчёт не попадают), а при заданном
+    ``count_cache_key`` ещё и кешируется на BLOG_FEED_COUNT_CACHE_TIMEOUT
+    секунд. Объекты текущей страницы берутся из исходного queryset.
+    """
+
+    def __init__(self, object_list, per_page, count_cache_key=None,
+                 **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_cache_key = count_cache_key
 
+    def _count_rows(self):
+        return self.object_list.order_by().count()
 
-def paginate_queryset(request, queryset, limit):
-    paginator = Paginator(queryset, limit)
-    page_number = request.GET.get('page')
-    return paginator.get_page(page_number)
+    @cached_property
+    def count(self):
+        timeout = cache_timeout('BLOG_FEED_COUNT_CACHE_TIMEOUT')
+        if self.count_cache_key is None or not timeout:
+            return self._count_rows()
+        count = cache.get(self.count_cache_key)
+        if count is None:
+            count = self._count_rows()
+            cache.set(
+                self.count_cache_key, count, feed_cache_timeout(timeout))
+        return count
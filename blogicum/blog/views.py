@@ -2,68 +2,106 @@
 from django.contrib.auth import logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
-from django.core.paginator import Paginator
-from django.db.models import Count
 from django.http import HttpResponseForbidden
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse, reverse_lazy
-from django.utils import timezone
-
+from django.utils.http import urlencode
+
+from .cache import (
+    FEEDS,
+    cache_page_for_anonymous,
+    conditional_render,
+    feed_validators,
+    page_validators,
+    post_scope,
+)
+from .comment_queue import (
+    enqueue_comment,
+    get_pending_comments,
+    queue_enabled,
+)
+from .feeds import paginate_feed
 from .forms import PostForm, UserProfileForm, CommentForm
+from .images import enqueue_image_variants
 from .models import Category, Post, Comment
-from .utils import get_published_posts, paginate_queryset
+from .purge import soft_delete_post
+from .routers import replica_reads
+from .search import get_search_page
+from .utils import (
+    get_author_posts,
+    get_comments_page,
+    get_visible_post_detail,
+    get_visible_posts,
+    get_published_posts,
+)
 
 LIMIT_POSTS_COUNT = 10
 
 
+@replica_reads
+@cache_page_for_anonymous(lambda: (FEEDS,))
 def index(request):
     """Views функция для главной страницы."""
-    post_list = get_published_posts()
-    paginator = Paginator(post_list, LIMIT_POSTS_COUNT)
-
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate_feed(
+        request, get_published_posts(), LIMIT_POSTS_COUNT, 'index')
 
     context = {
         'page_obj': page_obj,
     }
 
-    return render(request, 'blog/index.html', context)
+    return conditional_render(
+        request, 'blog/index.html', context,
+        feed_validators(request, page_obj))
 
 
+@replica_reads
+@cache_page_for_anonymous(lambda post_id: (post_scope(post_id),))
 def post_detail(request, post_id):
     """Views функция для детализации постов."""
-    post = get_object_or_404(Post, pk=post_id)
-
-    if post.author != request.user:
-        post = get_object_or_404(
-            Post.objects.filter(
-                is_published=True,
-                pub_date__lte=timezone.now(),
-                category__is_published=True,
-            ),
-            pk=post_id
-        )
-
-    comments = Comment.objects.filter(post=post)
+    post = get_object_or_404(get_visible_post_detail(request.user), pk=post_id)
+    comments = get_comments_page(post, None)
+    pending_comments = get_pending_comments(post, request.user)
     form = CommentForm()
 
-    if form.is_valid():
-        comment = form.save(commit=False)
-        comment.post = post
-        comment.author = request.user
-        comment.save()
-        return redirect('blog:post_detail', post_id=post.id)
-
     context = {
         'post': post,
         'comments': comments,
+        'pending_comments': pending_comments,
         'form': form,
     }
 
-    return render(request, 'blog/detail.html', context)
+    # Post.updated_at меняется и при любом изменении комментариев.
+    validators = page_validators(
+        request,
+        (
+            post.pk,
+            post.author.username,
+            [comment.author.username for comment in comments],
+            [comment.text for comment in pending_comments],
+        ),
+        (
+            post.updated_at,
+            post.pub_date,
+            post.category and post.category.updated_at,
+            post.location and post.location.updated_at,
+        ),
+    )
+    return conditional_render(
+        request, 'blog/detail.html', context, validators)
 
 
+def post_comments(request, post_id):
+    """Views функция отдаёт следующую порцию комментариев к посту."""
+    post = get_object_or_404(get_visible_posts(request.user), pk=post_id)
+    comments = get_comments_page(post, request.GET.get('cursor'))
+    return render(request, 'includes/comment_list.html', {
+        'post': post,
+        'comments': comments,
+    })
+
+
+@replica_reads
+@cache_page_for_anonymous(lambda category_slug: (FEEDS,))
 def category_posts(request, category_slug):
     """Views функция для вывода постов выбранной категории."""
     category = get_object_or_404(
@@ -72,14 +110,33 @@ def category_posts(request, category_slug):
         is_published=True
     )
 
-    post_list = get_published_posts().filter(category=category)
-    page_obj = paginate_queryset(request, post_list, LIMIT_POSTS_COUNT)
+    page_obj = paginate_feed(
+        request, get_published_posts().filter(category=category),
+        LIMIT_POSTS_COUNT, 'category', category.pk)
 
     context = {
         'category': category,
         'page_obj': page_obj,
     }
-    return render(request, 'blog/category.html', context)
+    return conditional_render(
+        request, 'blog/category.html', context,
+        feed_validators(
+            request, page_obj, category.pk,
+            modified=(category.updated_at,)))
+
+
+def search(request):
+    """Views функция для полнотекстового поиска по постам."""
+    query = request.GET.get('q', '').strip()
+    page_obj = get_search_page(
+        query, request.GET.get('page'), LIMIT_POSTS_COUNT)
+
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'page_query': urlencode({'q': query}) + '&',
+    }
+    return render(request, 'blog/search.html', context)
 
 
 @login_required
@@ -89,10 +146,9 @@ def create_post(request):
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
-
-        post.is_published = post.pub_date <= timezone.now()
-
         post.save()
+        if post.image:
+            enqueue_image_variants(post)
         profile_url = reverse(
             'blog:profile',
             kwargs={'username': request.user.username}
@@ -103,26 +159,26 @@ def create_post(request):
     return render(request, 'blog/create.html', {'form': form})
 
 
+@replica_reads
 def profile_view(request, username):
     """Views функция для отображения профиля автора."""
-    profile = get_object_or_404(User, username=username)
+    profile = get_object_or_404(
+        User, username=username, deletion__isnull=True)
 
-    posts = (
-        Post.objects
-        .filter(author=profile)
-        .annotate(comment_count=Count('comment'))
-        .order_by('-pub_date')
-    )
+    page_obj = paginate_feed(
+        request, get_author_posts(profile), LIMIT_POSTS_COUNT,
+        'author', profile.pk)
 
-    page_obj = paginate_queryset(request, posts, LIMIT_POSTS_COUNT)
-
-    return render(
+    return conditional_render(
         request,
         'blog/profile.html',
         {
             'profile': profile,
             'page_obj': page_obj
-        }
+        },
+        feed_validators(
+            request, page_obj,
+            profile.pk, profile.get_full_name(), profile.is_staff),
     )
 
 
@@ -153,7 +209,14 @@ def edit_post(request, post_id):
     form = PostForm(request.POST or None, request.FILES or None, instance=post)
 
     if form.is_valid():
+        image_changed = 'image' in form.changed_data
+        if image_changed:
+            # Копии старого файла больше не подходят: до готовности новых
+            # карточка показывает оригинал.
+            post.image_meta = {}
         form.save()
+        if image_changed and post.image:
+            enqueue_image_variants(post)
         return redirect('blog:post_detail', post_id=post.id)
 
     return render(request, 'blog/create.html', {'form': form, 'post': post})
@@ -166,7 +229,7 @@ def post_delete(request, post_id):
     if post.author != request.user:
         return redirect('blog:post_detail', post_id=post.id)
     if request.method == 'POST':
-        post.delete()
+        soft_delete_post(post)
         return redirect('blog:profile', username=request.user.username)
 
     return render(request, 'blog/create.html', {'post': post})
@@ -181,14 +244,15 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.post = post
         comment.author = request.user
-        comment.save()
+        if queue_enabled():
+            enqueue_comment(comment)
+        else:
+            comment.save()
         return redirect('blog:post_detail', post_id=post.id)
 
-    comments = post.comments.all().order_by('created_at')
     context = {
         'post': post,
         'form': form,
-        'comments': comments
     }
     return render(request, 'blog/comment.html', context)
 
@@ -198,7 +262,7 @@ def edit_comment(request, post_id, comment_id):
     post = get_object_or_404(Post, id=post_id)
     comment = get_object_or_404(Comment, id=comment_id)
 
-    if comment.author != request.user:
+    if comment.author_id != request.user.id:
         return HttpResponseForbidden(
             "Вы не имеете прав для редактирования этого комментария."
         )
@@ -209,12 +273,9 @@ def edit_comment(request, post_id, comment_id):
         form.save()
         return redirect('blog:post_detail', post_id=post.id)
 
-    comments = post.comment.all().order_by('created_at')
-
     return render(request, 'blog/comment.html', {
         'comment': comment,
         'post': post,
-        'comments': comments,
         'form': form
     })
 
@@ -224,7 +285,7 @@ def delete_comment(request, post_id, comment_id):
     post = get_object_or_404(Post, id=post_id)
     comment = get_object_or_404(Comment, id=comment_id)
 
-    if comment.author != request.user:
+    if comment.author_id != request.user.id:
         return HttpResponseForbidden(
             "Вы не имеете прав для удаления этого комментария."
         )
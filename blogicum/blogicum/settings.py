@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -46,10 +47,13 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'blog.middleware.ConnectionMetricsMiddleware',
+    'blog.middleware.QueryBudgetMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'blog.middleware.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
@@ -87,9 +91,33 @@ DATABASES = {
         'ENGINE': 'django.db.backends.sqlite3',
         # Файл с базой данных находится в одной папке с manage.py.
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Соединение живёт между запросами одного воркера до минуты:
+        # не нужно заново открывать файл и выполнять PRAGMA.
+        'CONN_MAX_AGE': 60,
     }
 }
 
+DATABASE_ROUTERS = ['blog.routers.ReplicaRouter']
+
+# Псевдонимы реплик из DATABASES для чтения в лентах и на странице
+# поста (blog.routers). Локально реплики — копии db.sqlite3, которые
+# обновляет команда sync_replicas:
+# DATABASES['replica1'] = {
+#     'ENGINE': 'django.db.backends.sqlite3',
+#     'NAME': BASE_DIR / 'db.replica1.sqlite3',
+#     'TEST': {'MIRROR': 'default'},
+# }
+# BLOG_READ_REPLICAS = ['replica1']
+BLOG_READ_REPLICAS = []
+
+# Сколько секунд после изменения данных пользователь читает только с
+# основной базы, чтобы видеть свои изменения.
+BLOG_REPLICA_PIN_SECONDS = 15
+
+# Проверять постоянное соединение перед запросом и переоткрывать
+# неработающее (blog.middleware.ConnectionMetricsMiddleware).
+BLOG_CONN_HEALTH_CHECKS = True
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -154,3 +182,78 @@ LOGIN_URL = 'login'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+
+# Кеш общий для веб-процессов и команд (publish_scheduled,
+# flush_comments, process_image_jobs, purge_deleted и отчётов): версии
+# страниц, списки id лент, счётчики и метрики должны быть видны всем.
+# Файловый кеш подходит для одного сервера; incr в нём не атомарен, так
+# что счётчики метрик приблизительны. Для нескольких серверов нужен
+# memcached. С локальным для процесса бэкендом (LocMemCache) кеши
+# страниц, лент и постов отключаются (см. blog.utils.cache_timeout).
+# FileBasedCache распаковывает pickle из всех своих файлов, поэтому
+# каталог должен быть доступен на запись только пользователю сайта:
+# не общий /tmp. BLOG_CACHE_DIR переопределяет путь.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('BLOG_CACHE_DIR', BASE_DIR / 'cache'),
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+}
+
+# Курсорная пагинация лент (index, category_posts, profile_view)
+# вместо номеров страниц: ?cursor=... вместо ?page=N.
+BLOG_KEYSET_PAGINATION = False
+
+# Сколько секунд хранить в кеше число публикаций ленты для пагинатора.
+# 0 — считать на каждый запрос.
+BLOG_FEED_COUNT_CACHE_TIMEOUT = 30
+
+# Сколько секунд хранить упорядоченные списки id постов лент (см.
+# blog/feeds.py). Сохранение и удаление постов сбрасывают списки
+# затронутых лент, срок лишь ограничивает ошибку при записи в обход
+# моделей. 0 — читать каждую страницу из базы через LIMIT/OFFSET.
+BLOG_FEED_IDS_CACHE_TIMEOUT = 60 * 5
+
+# Сколько секунд хранить посты с данными карточек для лент. Устаревшие
+# записи отбрасываются по версиям кеша страниц, срок нужен лишь для
+# вытеснения. 0 — загружать посты страницы из базы. Как и остальные
+# кеши со сбросом по версиям, работает только с общим кешем (CACHES).
+BLOG_POST_CACHE_TIMEOUT = 60 * 60
+
+# Сколько секунд хранить готовые страницы ленты, категорий и постов
+# для анонимных посетителей. 0 — не кешировать.
+BLOG_PAGE_CACHE_TIMEOUT = 60
+
+# Сколько секунд хранить HTML карточек постов. Ключ карточки меняется
+# вместе с её данными, так что срок нужен лишь для вытеснения старых
+# версий. 0 — не кешировать.
+BLOG_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+# PRAGMA для каждого нового соединения с SQLite (см. blog/db.py).
+# В режиме WAL чтение лент не ждёт записи комментариев, а busy_timeout
+# заставляет писателей ждать друг друга вместо «database is locked».
+BLOG_SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    # При WAL не теряет целостность при сбое, fsync — только на чекпойнтах.
+    'synchronous': 'normal',
+    'busy_timeout': 5000,
+    # Отрицательное значение — размер в КиБ: 64 МиБ на соединение.
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'memory',
+}
+
+# Отложенная запись комментариев (см. blog/comment_queue.py): add_comment
+# кладёт комментарий в файловую очередь вместо INSERT, в базу их пачками
+# переносит команда flush_comments --loop. Включать на время всплесков
+# записи, когда SQLite не успевает за потоком комментариев.
+BLOG_COMMENT_QUEUE = False
+BLOG_COMMENT_QUEUE_DIR = BASE_DIR / 'comment_queue'
+
+# Бюджеты SQL на один ответ для blog.middleware.QueryBudgetMiddleware:
+# число запросов, суммарное время в мс и число повторов одного SQL.
+# Ключ — имя view (request.resolver_match.view_name), '*' — остальные.
+BLOG_QUERY_BUDGETS = {
+    '*': {'queries': 10, 'sql_ms': 100, 'duplicates': 2},
+}
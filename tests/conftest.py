@@ -1,5 +1,9 @@
 import os
 import re
+import shutil
+import subprocess
+import sys
+import tempfile
 import time
 from http import HTTPStatus
 from inspect import getsource
@@ -18,7 +22,9 @@ from typing import (
 
 import pytest
 from django.apps import apps
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.db.models import Model, Field
 from django.forms import BaseForm
 from django.http import HttpResponse
@@ -26,6 +32,16 @@ from django.test import override_settings
 from django.test.client import Client
 from mixer.backend.django import mixer as _mixer
 
+MANAGE_PY = Path(__file__).resolve().parent.parent / "blogicum" / "manage.py"
+# Тесты очищают кеш, поэтому у них свой каталог, а не кеш запущенного
+# сайта. Кеш ещё не создан, когда загружается conftest; дочерние
+# процессы manage.py получают каталог через BLOG_CACHE_DIR.
+TEST_CACHE_DIR = tempfile.mkdtemp(prefix="blogicum-test-cache-")
+os.environ["BLOG_CACHE_DIR"] = TEST_CACHE_DIR
+settings.CACHES = {
+    "default": {**settings.CACHES["default"], "LOCATION": TEST_CACHE_DIR},
+}
+
 N_PER_FIXTURE = 3
 N_PER_PAGE = 10
 COMMENT_TEXT_DISPLAY_LEN_FOR_TESTS = 50
@@ -41,6 +57,39 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(scope="session", autouse=True)
+def remove_test_cache_dir():
+    yield
+    shutil.rmtree(TEST_CACHE_DIR, ignore_errors=True)
+
+
+@pytest.fixture
+def run_manage_py():
+    """Запускает manage.py в отдельном процессе (с тем же кешем)."""
+    def run(*args):
+        return subprocess.run(
+            [sys.executable, str(MANAGE_PY), *args],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+    return run
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # Кеш не откатывается вместе с транзакцией теста: каждый тест
+    # начинает и заканчивает с пустым кешем. Метрики, накопленные
+    # процессом, сбрасываются в кеш и очищаются вместе с ним.
+    from blog.db import metrics
+
+    metrics.flush()
+    cache.clear()
+    yield
+    metrics.flush()
+    cache.clear()
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
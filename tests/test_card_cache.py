@@ -0,0 +1,53 @@
+from unittest import mock
+
+import pytest
+from django.core.cache import cache
+
+from blog.cache import post_card_key
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_cards_cached_with_single_get_many(
+        user_client, mixer, many_posts_with_published_locations):
+    user_client.get("/")
+    page_posts = many_posts_with_published_locations
+    cached = [
+        key for key in (post_card_key(post) for post in page_posts)
+        if cache.get(key) is not None
+    ]
+    assert cached, "Убедитесь, что HTML карточек постов кешируется."
+
+    with mock.patch.object(
+        cache, "get_many", wraps=cache.get_many
+    ) as get_many, mock.patch(
+        "blog.templatetags.blog_cards.get_template"
+    ) as get_template:
+        response = user_client.get("/")
+    card_calls = [
+        call for call in get_many.call_args_list
+        if all(key.startswith("blog:card:") for key in call.args[0])
+    ]
+    assert len(card_calls) == 1, (
+        "Убедитесь, что карточки страницы читаются из кеша одним запросом."
+    )
+    get_template.return_value.render.assert_not_called()
+    assert response.content.decode("utf-8").count("<article") == len(
+        response.context["page_obj"]
+    )
+
+
+def test_card_follows_post_changes(
+        user_client, mixer, post_with_published_location):
+    post = post_with_published_location
+    user_client.get("/")
+    post.title = "Новый заголовок карточки"
+    post.save()
+    mixer.blend("blog.Comment", post=post)
+    content = user_client.get("/").content.decode("utf-8")
+    assert "Новый заголовок карточки" in content, (
+        "Убедитесь, что карточка перерисовывается после изменения поста."
+    )
+    assert "Комментарии (1)" in content, (
+        "Убедитесь, что карточка перерисовывается после нового комментария."
+    )
@@ -0,0 +1,65 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from blog.models import Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def comment_count(post):
+    post.refresh_from_db()
+    return post.comment_count
+
+
+def test_comment_count_follows_add_and_edit(
+        user_client, post_with_published_location):
+    post = post_with_published_location
+    for text in ("Первый", "Второй"):
+        user_client.post(f"/posts/{post.id}/comment/", {"text": text})
+    assert comment_count(post) == 2, (
+        "Убедитесь, что добавление комментария увеличивает"
+        " Post.comment_count."
+    )
+
+    comment = Comment.objects.filter(post=post).first()
+    user_client.post(
+        f"/posts/{post.id}/edit_comment/{comment.id}/", {"text": "Правка"}
+    )
+    assert Comment.objects.get(pk=comment.pk).text == "Правка"
+    assert comment_count(post) == 2, (
+        "Убедитесь, что правка комментария не меняет Post.comment_count."
+    )
+
+
+def test_comment_count_follows_deletes(mixer, post_with_published_location):
+    post = post_with_published_location
+    comments = mixer.cycle(4).blend("blog.Comment", post=post)
+    assert comment_count(post) == 4
+
+    # Так удаляет комментарий страница удаления в админке.
+    comments[0].delete()
+    assert comment_count(post) == 3, (
+        "Убедитесь, что удаление комментария уменьшает Post.comment_count."
+    )
+
+    # Так удаляет выбранные комментарии действие delete_selected.
+    Comment.objects.filter(pk__in=[c.pk for c in comments[1:3]]).delete()
+    assert comment_count(post) == 1, (
+        "Убедитесь, что массовое удаление комментариев уменьшает"
+        " Post.comment_count."
+    )
+
+
+def test_recount_comments_fixes_drift(mixer, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(2).blend("blog.Comment", post=post)
+    Post.objects.filter(pk=post.pk).update(comment_count=99)
+
+    out = StringIO()
+    call_command("recount_comments", stdout=out)
+    assert comment_count(post) == 2, (
+        "Убедитесь, что recount_comments исправляет разошедшийся счётчик."
+    )
+    assert "Исправлено счётчиков: 1" in out.getvalue()
@@ -0,0 +1,86 @@
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+
+from blog.models import Comment
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def comment_queue(tmp_path):
+    with override_settings(
+        BLOG_COMMENT_QUEUE=True, BLOG_COMMENT_QUEUE_DIR=tmp_path
+    ):
+        yield tmp_path
+
+
+def test_queued_comment_written_by_worker(
+        user_client, another_user_client, post_with_published_location,
+        comment_queue):
+    post = post_with_published_location
+    url = f"/posts/{post.id}/"
+    response = user_client.post(
+        f"/posts/{post.id}/comment/", {"text": "Комментарий из очереди"}
+    )
+    assert response.status_code == 302
+    assert not Comment.objects.exists(), (
+        "Убедитесь, что при BLOG_COMMENT_QUEUE комментарий не пишется в"
+        " базу в запросе."
+    )
+    assert len(list(comment_queue.glob("*/*/*.json"))) == 1
+
+    # Другой процесс не видит кеша этого: копия должна браться из очереди.
+    cache.clear()
+    content = user_client.get(url).content.decode("utf-8")
+    assert "Комментарий из очереди" in content, (
+        "Убедитесь, что автор сразу видит свой комментарий из очереди."
+    )
+    assert "Комментарий из очереди" not in (
+        another_user_client.get(url).content.decode("utf-8")
+    ), "Убедитесь, что комментарий из очереди виден только автору."
+
+    flushed_at = timezone.now()
+    call_command("flush_comments")
+    comment = Comment.objects.get()
+    assert comment.text == "Комментарий из очереди"
+    assert comment.created_at < flushed_at, (
+        "Убедитесь, что flush_comments сохраняет время отправки"
+        " комментария, а не время записи в базу."
+    )
+    post.refresh_from_db()
+    assert post.comment_count == 1, (
+        "Убедитесь, что flush_comments обновляет счётчик комментариев."
+    )
+    assert not list(comment_queue.glob("*/*/*.json"))
+    content = user_client.get(url).content.decode("utf-8")
+    assert content.count("Комментарий из очереди") == 1, (
+        "Убедитесь, что записанный комментарий выводится один раз."
+    )
+    assert "ожидает публикации" not in content
+
+
+def test_flush_keeps_order_and_send_time(
+        user_client, another_user_client, post_with_published_location):
+    post = post_with_published_location
+    sent = []
+    for client, text in (
+        (user_client, "первый"),
+        (another_user_client, "второй"),
+        (user_client, "третий"),
+    ):
+        client.post(f"/posts/{post.id}/comment/", {"text": text})
+        sent.append(timezone.now())
+
+    call_command("flush_comments")
+    comments = list(Comment.objects.order_by("pk"))
+    assert [comment.text for comment in comments] == [
+        "первый", "второй", "третий"
+    ], "Убедитесь, что flush_comments записывает очередь по порядку."
+    for comment, sent_before in zip(comments, sent):
+        assert comment.created_at <= sent_before, (
+            "Убедитесь, что каждому комментарию возвращается его время"
+            " отправки."
+        )
@@ -0,0 +1,83 @@
+import pytest
+from django.utils import timezone
+from django.utils.http import http_date
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.mark.parametrize("client_fixture", ["user_client", "client"])
+def test_feed_not_modified(
+        request, client_fixture, mixer, post_with_published_location):
+    client = request.getfixturevalue(client_fixture)
+    post = post_with_published_location
+    response = client.get("/")
+    etag = response["ETag"]
+    assert response.has_header("ETag"), (
+        "Убедитесь, что лента отдаёт заголовок ETag."
+    )
+
+    response = client.get("/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304, (
+        "Убедитесь, что лента отвечает 304 на запрос с актуальным ETag."
+    )
+    assert not response.templates
+
+    mixer.blend("blog.Comment", post=post)
+    response = client.get("/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200, (
+        "Убедитесь, что ETag ленты меняется вместе со счётчиком комментариев."
+    )
+
+
+def test_feed_ignores_if_modified_since(
+        client, mixer, user, post_with_published_location):
+    post = post_with_published_location
+    newest = mixer.blend(
+        "blog.Post",
+        author=user,
+        category=post.category,
+        location=post.location,
+        is_published=True,
+        pub_date=timezone.now(),
+    )
+    assert not client.get("/").has_header("Last-Modified"), (
+        "Убедитесь, что лента не отдаёт Last-Modified: снятие поста с"
+        " публикации не меняет даты оставшихся строк."
+    )
+    newest.is_published = False
+    newest.save()
+    response = client.get(
+        "/", HTTP_IF_MODIFIED_SINCE=http_date(timezone.now().timestamp()))
+    assert response.status_code == 200, (
+        "Убедитесь, что после снятия поста с публикации лента не отвечает"
+        " 304 на If-Modified-Since."
+    )
+    assert newest.title not in response.content.decode("utf-8")
+
+
+def test_post_detail_not_modified(
+        user_client, another_user_client, mixer,
+        post_with_published_location):
+    post = post_with_published_location
+    comment = mixer.blend("blog.Comment", post=post)
+    url = f"/posts/{post.id}/"
+    response = user_client.get(url)
+    last_modified = response["Last-Modified"]
+
+    response = user_client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert response.status_code == 304, (
+        "Убедитесь, что страница поста отвечает 304 на If-Modified-Since."
+    )
+    response = another_user_client.get(
+        url, HTTP_IF_NONE_MATCH=user_client.get(url)["ETag"])
+    assert response.status_code == 200, (
+        "Убедитесь, что ETag страницы зависит от пользователя."
+    )
+
+    etag = user_client.get(url)["ETag"]
+    comment.text = "Исправленный комментарий"
+    comment.save()
+    response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200, (
+        "Убедитесь, что изменение комментария меняет ETag страницы поста."
+    )
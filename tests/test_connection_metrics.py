@@ -0,0 +1,36 @@
+import pytest
+from django.db import connection
+
+from blog.db import get_connection_stats, metrics
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_connection_reuse_recorded(client, monkeypatch):
+    response = client.get("/")
+    assert response.wsgi_request.db_connection_metrics["reused"], (
+        "Убедитесь, что открытое соединение с БД переиспользуется."
+    )
+
+    # Неработающее соединение должно быть закрыто и открыто заново.
+    monkeypatch.setattr(connection, "is_usable", lambda: False)
+    closed = []
+    monkeypatch.setattr(connection, "close", lambda: closed.append(True))
+    response = client.get("/")
+    assert closed, "Убедитесь, что соединение проверяется перед запросом."
+    assert not response.wsgi_request.db_connection_metrics["reused"]
+
+    stats = get_connection_stats()
+    assert stats["requests"] == 2
+    assert stats["reused"] == 1
+
+
+def test_connection_stats_read_by_other_process(client, run_manage_py):
+    client.get("/")
+    client.get("/")
+    metrics.flush()
+    output = run_manage_py("connection_stats")
+    assert "requests=2 " in output, (
+        "Убедитесь, что connection_stats читает метрики веб-процессов из"
+        " общего кеша."
+    )
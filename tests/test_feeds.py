@@ -0,0 +1,79 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from blog.feeds import FEED_IDS_LIMIT, feed_ids_key
+
+pytestmark = [pytest.mark.django_db]
+
+
+def page_post_ids(response):
+    return [post.id for post in response.context["page_obj"]]
+
+
+def test_warm_feed_reads_no_posts_from_db(
+        user_client, many_posts_with_published_locations):
+    first = user_client.get("/", {"page": 2})
+    with CaptureQueriesContext(connection) as queries:
+        second = user_client.get("/", {"page": 2})
+    post_sql = [
+        query["sql"] for query in queries.captured_queries
+        if 'FROM "blog_post"' in query["sql"]
+    ]
+    assert not post_sql, (
+        "Убедитесь, что повторный запрос страницы ленты берёт список id и"
+        " посты из кеша, не обращаясь к таблице постов."
+    )
+    assert page_post_ids(second) == page_post_ids(first)
+
+
+def test_feed_ids_follow_post_changes(
+        user_client, post_with_published_location,
+        another_category):
+    post = post_with_published_location
+    category_url = f"/category/{post.category.slug}/"
+    user_client.get("/")
+    user_client.get(category_url)
+
+    post.title = "Новый заголовок"
+    post.save()
+    assert cache.get(feed_ids_key("index")) is not None, (
+        "Убедитесь, что правка текста поста не сбрасывает списки id лент."
+    )
+    response = user_client.get("/")
+    assert response.context["page_obj"][0].title == "Новый заголовок", (
+        "Убедитесь, что закешированный пост обновляется после правки."
+    )
+
+    post.category = another_category
+    post.save()
+    assert post.id not in page_post_ids(user_client.get(category_url)), (
+        "Убедитесь, что пост пропадает из ленты прежней категории."
+    )
+
+    post.delete()
+    assert post.id not in page_post_ids(user_client.get("/")), (
+        "Убедитесь, что удалённый пост пропадает из ленты."
+    )
+
+
+@override_settings(BLOG_FEED_IDS_CACHE_TIMEOUT=0)
+def test_uncached_feed_reads_one_page(
+        user_client, many_posts_with_published_locations):
+    with CaptureQueriesContext(connection) as queries:
+        response = user_client.get("/", {"page": 2})
+    assert len(response.context["page_obj"]) == 10
+    post_sql = [
+        query["sql"] for query in queries.captured_queries
+        if 'FROM "blog_post"' in query["sql"]
+    ]
+    assert not any(f"LIMIT {FEED_IDS_LIMIT}" in sql for sql in post_sql), (
+        "Убедитесь, что без кеша списков id лента не выбирает"
+        " FEED_IDS_LIMIT id на каждый запрос."
+    )
+    assert any("LIMIT 10 OFFSET 10" in sql for sql in post_sql), (
+        "Убедитесь, что без кеша списков id страница ленты читается"
+        " одним LIMIT/OFFSET."
+    )
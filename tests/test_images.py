@@ -0,0 +1,105 @@
+from importlib import import_module
+from io import BytesIO, StringIO
+
+import pytest
+from bs4 import BeautifulSoup
+from django.apps import apps
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+from PIL import Image
+
+from blog.images import VARIANT_WIDTHS, variant_name
+from blog.models import ImageJob, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def make_upload(width, height):
+    buffer = BytesIO()
+    Image.new("RGB", (width, height), color=(73, 109, 137)).save(
+        buffer, format="JPEG"
+    )
+    return SimpleUploadedFile(
+        "big.jpg", buffer.getvalue(), content_type="image/jpeg"
+    )
+
+
+def test_card_uses_image_variants(
+        tmp_path, user, user_client, published_category):
+    with override_settings(MEDIA_ROOT=tmp_path):
+        user_client.post("/posts/create/", {
+            "title": "Пост с картинкой",
+            "text": "Текст",
+            "pub_date": timezone.now().strftime("%Y-%m-%dT%H:%M"),
+            "category": published_category.id,
+            "image": make_upload(1200, 800),
+        })
+        post = Post.objects.get(title="Пост с картинкой")
+        assert post.image_meta == {}, (
+            "Убедитесь, что копии изображения создаются не в обработчике"
+            " запроса, а фоновым заданием."
+        )
+        assert ImageJob.objects.filter(
+            post=post, image_name=post.image.name
+        ).exists()
+        content = user_client.get("/").content.decode("utf-8")
+        img = BeautifulSoup(content, features="html.parser").find(
+            "img", src=post.image.url
+        )
+        assert img is not None and not img.get("srcset"), (
+            "Убедитесь, что до готовности копий карточка выводит оригинал."
+        )
+
+        # Оригинал другого поста с именем, похожим на имя копии.
+        root = post.image.name.rsplit(".", 1)[0]
+        other_original = tmp_path / f"{root}_w320.jpg"
+        other_original.write_bytes(b"original")
+
+        call_command("process_image_jobs", workers=1, stdout=StringIO())
+        assert other_original.read_bytes() == b"original", (
+            "Убедитесь, что копии пишутся в отдельный каталог и не"
+            " затирают загруженные файлы."
+        )
+        post.refresh_from_db()
+        assert not ImageJob.objects.exists()
+        assert post.image_meta == {
+            "width": 1200, "height": 800, "variants": list(VARIANT_WIDTHS)
+        }, "Убедитесь, что при загрузке создаются уменьшенные копии."
+        for width in VARIANT_WIDTHS:
+            for image_format in ("JPEG", "WEBP"):
+                name = variant_name(
+                    post.pk, post.image.name, width, image_format)
+                assert name.startswith(f"post_images/variants/{post.pk}/")
+                with Image.open(tmp_path / name) as variant:
+                    assert variant.width == width
+                    assert variant.format == image_format
+
+        content = user_client.get("/").content.decode("utf-8")
+    img = BeautifulSoup(content, features="html.parser").find(
+        "img", srcset=True
+    )
+    assert img is not None, "Убедитесь, что в карточке поста есть srcset."
+    assert img["width"] == "1200" and img["height"] == "800"
+    assert "_w320.jpg 320w" in img["srcset"]
+    assert img.find_previous_sibling("source")["type"] == "image/webp"
+
+
+def test_variants_migration_falls_back_to_original(
+        client, post_with_published_location):
+    post = post_with_published_location
+    Post.objects.filter(pk=post.pk).update(
+        image_meta={"width": 1200, "height": 800, "variants": [320]})
+    migration = import_module("blog.migrations.0011_image_variants_dir")
+    migration.enqueue_variant_jobs(apps, None)
+
+    post.refresh_from_db()
+    assert post.image_meta == {}, (
+        "Убедитесь, что до пересоздания копий в новом каталоге карточка"
+        " выводит оригинал, а не адреса несуществующих копий."
+    )
+    assert ImageJob.objects.filter(
+        post=post, image_name=post.image.name).exists()
+    content = client.get("/").content.decode("utf-8")
+    assert "/variants/" not in content
@@ -0,0 +1,116 @@
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import override_settings
+from django.utils import timezone
+
+from blog.cache import FEEDS, version_key
+
+LOCAL_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+}
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_anonymous_pages_cached_and_invalidated(
+        client, user_client, mixer, post_with_published_location):
+    post = post_with_published_location
+    detail_url = f"/posts/{post.id}/"
+
+    for url in ("/", f"/category/{post.category.slug}/", detail_url):
+        assert client.get(url)["X-Page-Cache"] == "MISS"
+        assert client.get(url)["X-Page-Cache"] == "HIT", (
+            f"Убедитесь, что страница `{url}` кешируется для анонимов."
+        )
+        assert "X-Page-Cache" not in user_client.get(url), (
+            "Убедитесь, что авторизованные пользователи получают страницу"
+            " в обход кеша."
+        )
+
+    comment = mixer.blend("blog.Comment", post=post)
+    response = client.get(detail_url)
+    assert response["X-Page-Cache"] == "MISS"
+    assert f"comment_{comment.id}" in response.content.decode("utf-8"), (
+        "Убедитесь, что новый комментарий сбрасывает кеш страницы поста."
+    )
+    assert client.get("/")["X-Page-Cache"] == "MISS", (
+        "Убедитесь, что новый комментарий сбрасывает кеш ленты."
+    )
+
+    post.category.is_published = False
+    post.category.save()
+    assert client.get(detail_url).status_code == 404
+
+
+def test_scheduled_post_resets_feed_cache(
+        client, mixer, user, published_category):
+    post = mixer.blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        is_published=True,
+        pub_date=timezone.now() + timedelta(hours=1),
+    )
+    assert client.get("/")["X-Page-Cache"] == "MISS"
+    assert client.get("/")["X-Page-Cache"] == "HIT"
+
+    # Время публикации наступило без сохранения модели.
+    type(post).objects.filter(pk=post.pk).update(
+        pub_date=timezone.now() - timedelta(seconds=1))
+    call_command("publish_scheduled")
+    response = client.get("/")
+    assert response["X-Page-Cache"] == "MISS", (
+        "Убедитесь, что планировщик сбрасывает кеш ленты, когда наступает"
+        " время отложенной публикации."
+    )
+    assert post in response.context["page_obj"]
+
+
+def test_invalidation_reaches_other_processes(run_manage_py):
+    cache.set(version_key(FEEDS), 1, None)
+    run_manage_py(
+        "shell", "-c",
+        "from blog.cache import FEEDS, invalidate_pages;"
+        " invalidate_pages(FEEDS)",
+    )
+    assert cache.get(version_key(FEEDS)) == 2, (
+        "Убедитесь, что кеш общий для процессов: сброс версий из команды"
+        " должен доходить до веб-процессов."
+    )
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+def test_process_local_cache_disables_page_cache(
+        client, post_with_published_location):
+    client.get("/")
+    assert "X-Page-Cache" not in client.get("/"), (
+        "Убедитесь, что с локальным для процесса кешем страницы не"
+        " кешируются: сброс из других процессов до него не доходит."
+    )
+    with pytest.raises(CommandError):
+        call_command("page_cache_stats")
+
+
+def test_scheduler_without_checkpoint_covers_cached_feeds(
+        client, mixer, user, published_category):
+    post = mixer.blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        is_published=True,
+        pub_date=timezone.now() + timedelta(hours=1),
+    )
+    client.get("/")
+    # Пост вышел раньше, чем interval назад, а отметки планировщика нет:
+    # например, cron не запускался, а кеш ленты ещё жив.
+    type(post).objects.filter(pk=post.pk).update(
+        pub_date=timezone.now() - timedelta(seconds=50))
+    call_command("publish_scheduled", interval=10)
+    response = client.get("/")
+    assert post in response.context["page_obj"], (
+        "Убедитесь, что без сохранённой отметки планировщик проверяет"
+        " публикации за весь срок жизни кеша лент."
+    )
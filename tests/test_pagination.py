@@ -0,0 +1,171 @@
+import base64
+import json
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+from blog.utils import LIMIT_COMMENTS_COUNT, feed_count_key
+from conftest import N_PER_PAGE
+
+NULL_CURSOR = base64.urlsafe_b64encode(
+    json.dumps(["next", [None, None]]).encode()).decode()
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def many_feed_posts(mixer: Mixer, user, published_category):
+    # Две публикации на каждую дату: курсор должен различать их по id.
+    now = timezone.now()
+    dates = (
+        now - timedelta(days=i // 2)
+        for i in range(N_PER_PAGE * 2 + 5)
+    )
+    return mixer.cycle(N_PER_PAGE * 2 + 5).blend(
+        "blog.Post",
+        author=user,
+        is_published=True,
+        category=published_category,
+        location=None,
+        pub_date=dates,
+    )
+
+
+@override_settings(BLOG_KEYSET_PAGINATION=True)
+def test_keyset_pagination(client, many_feed_posts):
+    seen = []
+    cursor = None
+    pages = []
+    while True:
+        response = client.get("/", {"cursor": cursor} if cursor else {})
+        page_obj = response.context["page_obj"]
+        pages.append(page_obj)
+        seen.extend(post.id for post in page_obj)
+        if not page_obj.has_next():
+            break
+        cursor = page_obj.next_cursor
+
+    expected = sorted(
+        many_feed_posts, key=lambda p: (p.pub_date, p.id), reverse=True
+    )
+    assert seen == [post.id for post in expected], (
+        "Убедитесь, что курсорная пагинация обходит ленту без пропусков и"
+        " повторов в порядке «от новых к старым»."
+    )
+    assert len(pages) == 3
+    assert not pages[0].has_previous()
+
+    response = client.get("/", {"cursor": pages[-1].previous_cursor})
+    assert [post.id for post in response.context["page_obj"]] == [
+        post.id for post in pages[-2]
+    ], "Убедитесь, что курсор предыдущей страницы возвращает её целиком."
+
+    for cursor in ("not-a-cursor", NULL_CURSOR):
+        response = client.get("/", {"cursor": cursor})
+        assert response.status_code == 200, (
+            "Убедитесь, что неверный курсор открывает первую страницу."
+        )
+        assert [post.id for post in response.context["page_obj"]] == [
+            post.id for post in pages[0]
+        ]
+
+
+def test_comments_load_more(client, mixer, post_with_published_location):
+    post = post_with_published_location
+    comments = mixer.cycle(LIMIT_COMMENTS_COUNT + 5).blend(
+        "blog.Comment", post=post
+    )
+    response = client.get(f"/posts/{post.id}/")
+    first_page = response.context["comments"]
+    assert [c.id for c in first_page] == [
+        c.id for c in comments[:LIMIT_COMMENTS_COUNT]
+    ], "Убедитесь, что на странице поста выводится первая порция комментариев."
+    assert first_page.has_next()
+
+    response = client.get(
+        f"/posts/{post.id}/comments/", {"cursor": first_page.next_cursor}
+    )
+    content = response.content.decode("utf-8")
+    assert all(
+        f"comment_{c.id}" in content
+        for c in comments[LIMIT_COMMENTS_COUNT:]
+    ), "Убедитесь, что «Показать ещё» отдаёт оставшиеся комментарии."
+    assert "js-load-comments" not in content
+
+    for cursor in ("not-a-cursor", NULL_CURSOR):
+        response = client.get(
+            f"/posts/{post.id}/comments/", {"cursor": cursor}
+        )
+        assert response.status_code == 200, (
+            "Убедитесь, что неверный курсор комментариев не приводит к"
+            " ошибке сервера."
+        )
+        assert f"comment_{comments[0].id}" in response.content.decode(
+            "utf-8"
+        ), "Убедитесь, что неверный курсор отдаёт первую порцию."
+
+
+@override_settings(BLOG_FEED_IDS_CACHE_TIMEOUT=0)
+def test_feed_count_cached_without_card_joins(
+        user_client, many_feed_posts, mixer, user, published_category):
+    def get_feed():
+        with CaptureQueriesContext(connection) as queries:
+            response = user_client.get("/")
+        count_sql = [
+            query["sql"] for query in queries.captured_queries
+            if "COUNT(" in query["sql"]
+        ]
+        return response.context["page_obj"].paginator.count, count_sql
+
+    total, count_sql = get_feed()
+    assert total == len(many_feed_posts)
+    assert len(count_sql) == 1
+    assert "auth_user" not in count_sql[0], (
+        "Убедитесь, что COUNT ленты выполняется без JOIN-ов карточек."
+    )
+    assert "blog_location" not in count_sql[0]
+    assert "ORDER BY" not in count_sql[0]
+
+    assert get_feed() == (total, []), (
+        "Убедитесь, что число публикаций ленты берётся из кеша."
+    )
+
+    mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, pub_date=timezone.now(),
+    )
+    total_after, count_sql = get_feed()
+    assert count_sql and total_after == total + 1, (
+        "Убедитесь, что новая публикация сбрасывает закешированное число"
+        " публикаций ленты."
+    )
+
+
+@pytest.mark.parametrize("page", [1, 50_000, 100_000])
+def test_paginator_links_bounded_at_scale(user_client, many_feed_posts, page):
+    # Счётчик ленты из кеша: 100 тысяч страниц без миллиона постов в базе.
+    # Список id короче ленты, поэтому число постов берётся из счётчика.
+    cache.set(feed_count_key("index"), 1_000_000 + 5)
+    try:
+        with mock.patch("blog.feeds.FEED_IDS_LIMIT", N_PER_PAGE):
+            response = user_client.get("/", {"page": page})
+    finally:
+        cache.delete(feed_count_key("index"))
+    content = response.content.decode("utf-8")
+    assert response.context["page_obj"].number == page
+    assert content.count('class="page-item') <= 16, (
+        "Убедитесь, что пагинатор выводит только ближайшие, первые и"
+        " последние страницы, а не ссылку на каждую страницу ленты."
+    )
+    assert len(content) < 50_000, (
+        "Убедитесь, что размер страницы ленты не зависит от числа страниц."
+    )
+    assert f"page={page + 1 if page < 100_000 else page - 1}" in content
+    assert "…" in content
@@ -0,0 +1,93 @@
+import json
+from importlib import import_module
+
+import pytest
+from django.apps import apps
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.html import escape
+
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_excerpt_computed_on_save(post_with_published_location):
+    post = post_with_published_location
+    post.text = " ".join(f"слово{i}" for i in range(450))
+    post.save(update_fields=["text"])
+    post.refresh_from_db()
+    assert post.excerpt == (
+        " ".join(f"слово{i}" for i in range(10)) + " …"
+    ), "Убедитесь, что анонс поста пересчитывается при сохранении текста."
+    assert post.reading_time == 3, (
+        "Убедитесь, что время чтения считается по числу слов в тексте."
+    )
+
+
+def test_feed_does_not_load_post_text(
+        user_client, many_posts_with_published_locations):
+    with CaptureQueriesContext(connection) as queries:
+        response = user_client.get("/")
+    feed_sql = [
+        query["sql"] for query in queries.captured_queries
+        if 'FROM "blog_post"' in query["sql"]
+        and "COUNT(" not in query["sql"]
+    ]
+    assert feed_sql and all(
+        '"blog_post"."text"' not in sql for sql in feed_sql
+    ), "Убедитесь, что лента не загружает полный текст постов."
+    post = response.context["page_obj"][0]
+    assert escape(post.excerpt) in response.content.decode("utf-8"), (
+        "Убедитесь, что карточка поста выводит анонс."
+    )
+
+
+def test_fill_post_summaries(many_posts_with_published_locations):
+    Post.objects.update(excerpt="", reading_time=0)
+    call_command("fill_post_summaries", batch_size=3)
+    for post in Post.objects.all():
+        assert post.excerpt and post.reading_time, (
+            "Убедитесь, что команда fill_post_summaries заполняет анонс "
+            "и время чтения у всех постов."
+        )
+
+
+def test_migration_backfills_summaries(many_posts_with_published_locations):
+    Post.objects.update(excerpt="", reading_time=0)
+    migration = import_module("blog.migrations.0009_post_summary")
+    migration.fill_summaries(apps, None)
+    assert not Post.objects.filter(excerpt="").exists(), (
+        "Убедитесь, что миграция заполняет анонсы существующих постов."
+    )
+    assert not Post.objects.filter(reading_time=0).exists()
+
+
+def test_loaddata_fills_summaries(tmp_path, user):
+    fixture = tmp_path / "posts.json"
+    fixture.write_text(json.dumps([
+        {
+            "model": "blog.category", "pk": 1,
+            "fields": {
+                "created_at": "2022-12-18T23:06:18Z", "is_published": True,
+                "title": "Категория", "description": "Описание",
+                "slug": "category",
+            },
+        },
+        {
+            "model": "blog.post", "pk": 1,
+            "fields": {
+                "created_at": "2022-12-18T23:06:18Z", "is_published": True,
+                "title": "Обед", "text": "Обед у Морозовой.",
+                "pub_date": "1897-02-13T00:00:00Z", "author": user.pk,
+                "category": 1, "location": None,
+            },
+        },
+    ], ensure_ascii=False), encoding="utf-8")
+    call_command("loaddata", str(fixture), verbosity=0)
+    post = Post.objects.get(pk=1)
+    assert (post.excerpt, post.reading_time) == ("Обед у Морозовой.", 1), (
+        "Убедитесь, что loaddata заполняет анонс и время чтения постов из"
+        " старых фикстур."
+    )
@@ -0,0 +1,86 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.fake_data import populate
+from blog.models import Comment, Post
+from blog.purge import soft_delete_post, soft_delete_user
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_post_deleted_in_batches(
+        user_client, mixer, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(5).blend("blog.Comment", post=post)
+    user_client.post(f"/posts/{post.id}/delete/")
+    assert not Post.objects.filter(pk=post.id).exists()
+    assert Comment.objects.filter(post_id=post.id).count() == 5, (
+        "Убедитесь, что запрос на удаление поста только скрывает его, а"
+        " комментарии удаляет фоновая команда."
+    )
+    assert user_client.get(f"/posts/{post.id}/").status_code == 404
+
+    with CaptureQueriesContext(connection) as queries:
+        call_command("purge_deleted", batch_size=2)
+    comment_deletes = [
+        query["sql"] for query in queries.captured_queries
+        if query["sql"].startswith('DELETE FROM "blog_comment"')
+    ]
+    assert len(comment_deletes) == 3, (
+        "Убедитесь, что purge_deleted удаляет комментарии пачками по"
+        " --batch-size."
+    )
+    assert not Post.all_objects.filter(pk=post.id).exists()
+    assert not Comment.objects.filter(post_id=post.id).exists()
+
+
+def test_user_deleted_in_background(
+        client, mixer, user, post_with_published_location,
+        post_of_another_author):
+    own_post = post_with_published_location
+    comments = mixer.cycle(3).blend(
+        "blog.Comment", post=post_of_another_author, author=user)
+    detail_url = f"/posts/{post_of_another_author.id}/"
+    client.get(detail_url)
+    post_of_another_author.refresh_from_db()
+    modified = post_of_another_author.updated_at
+    soft_delete_user(user)
+
+    post_of_another_author.refresh_from_db()
+    assert post_of_another_author.updated_at > modified, (
+        "Убедитесь, что скрытие комментариев меняет дату изменения поста."
+    )
+    content = client.get(detail_url).content.decode("utf-8")
+    assert not any(f"comment_{c.id}" in content for c in comments), (
+        "Убедитесь, что комментарии удаляемого пользователя скрыты сразу,"
+        " до фоновой очистки."
+    )
+
+    assert client.get(f"/profile/{user.username}/").status_code == 404, (
+        "Убедитесь, что профиль удаляемого пользователя сразу скрыт."
+    )
+    feed_ids = [post.id for post in client.get("/").context["page_obj"]]
+    assert own_post.id not in feed_ids
+    assert post_of_another_author.id in feed_ids
+
+    call_command("purge_deleted", batch_size=2)
+    assert not get_user_model().objects.filter(pk=user.pk).exists()
+    assert not Post.all_objects.filter(pk=own_post.id).exists()
+    post_of_another_author.refresh_from_db()
+    assert post_of_another_author.comment_count == 0, (
+        "Убедитесь, что при удалении комментариев пользователя уменьшаются"
+        " счётчики комментариев чужих постов."
+    )
+
+
+def test_populate_skips_soft_deleted_ids():
+    populate(5, comments_per_post=0)
+    soft_delete_post(Post.objects.order_by("-pk").first())
+    populate(8, comments_per_post=0)
+    assert Post.all_objects.count() == 8, (
+        "Убедитесь, что генератор данных учитывает помеченные удалёнными"
+        " посты и не повторяет их id."
+    )
@@ -0,0 +1,100 @@
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.test import override_settings
+
+pytestmark = [pytest.mark.django_db]
+
+# Сессия и пользователь для user_client + собственные запросы страницы.
+AUTH_QUERIES = 2
+# COUNT для пагинатора, дата ближайшей отложенной публикации (при
+# холодном кеше) и выборка карточек.
+FEED_PAGE_QUERIES = 3
+
+
+def assert_page_within_budget(
+        client, url, budget, django_assert_max_num_queries):
+    with django_assert_max_num_queries(budget):
+        response = client.get(url)
+    assert response.status_code == 200, f"Страница `{url}` недоступна."
+
+
+def test_feed_query_budget(
+        user_client,
+        many_posts_with_published_locations,
+        django_assert_max_num_queries,
+):
+    post = many_posts_with_published_locations[0]
+    for url, budget in (
+        ("/", AUTH_QUERIES + FEED_PAGE_QUERIES),
+        (
+            f"/category/{post.category.slug}/",
+            AUTH_QUERIES + FEED_PAGE_QUERIES + 1,
+        ),
+        (
+            f"/profile/{post.author.username}/",
+            AUTH_QUERIES + FEED_PAGE_QUERIES + 1,
+        ),
+    ):
+        assert_page_within_budget(
+            user_client, url, budget, django_assert_max_num_queries
+        )
+
+
+def test_post_detail_query_budget(
+        client,
+        user_client,
+        mixer,
+        post_with_published_location,
+        django_assert_max_num_queries,
+):
+    post = post_with_published_location
+    mixer.cycle(3).blend("blog.Comment", post=post)
+    url = f"/posts/{post.id}/"
+    # Пост вместе с автором, категорией и местом + комментарии с авторами.
+    assert_page_within_budget(client, url, 2, django_assert_max_num_queries)
+    assert_page_within_budget(
+        user_client, url, AUTH_QUERIES + 2, django_assert_max_num_queries
+    )
+
+
+def test_query_budget_middleware(
+        user_client, post_with_published_location, caplog):
+    response = user_client.get("/")
+    stats = response.wsgi_request.query_stats
+    assert stats["view"] == "blog:index"
+    assert f'desc="{stats["queries"]} queries' in response["Server-Timing"], (
+        "Убедитесь, что ответ содержит заголовок Server-Timing с числом"
+        " SQL-запросов."
+    )
+
+    with override_settings(BLOG_QUERY_BUDGETS={"blog:index": {"queries": 0}}):
+        user_client.get("/")
+    assert any(
+        "blog:index" in record.getMessage() for record in caplog.records
+    ), "Убедитесь, что превышение бюджета запросов пишется в лог."
+
+
+def test_query_budget_report(user_client, post_with_published_location):
+    user_client.get("/")
+    user_client.get("/")
+    out = StringIO()
+    call_command("query_budget_report", stdout=out)
+    row = next(
+        line for line in out.getvalue().splitlines()
+        if line.startswith("blog:index")
+    )
+    assert row.split()[1] == "2", (
+        "Убедитесь, что query_budget_report показывает накопленные"
+        " процессами запросы."
+    )
+
+    local_caches = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        },
+    }
+    with override_settings(CACHES=local_caches):
+        with pytest.raises(CommandError):
+            call_command("query_budget_report")
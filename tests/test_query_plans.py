@@ -0,0 +1,49 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+
+def get_view_query_plans(client, url):
+    """Выполняет EXPLAIN QUERY PLAN для каждого SELECT, сделанного view."""
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url)
+    assert response.status_code == 200, f"Страница `{url}` недоступна."
+    plans = []
+    with connection.cursor() as cursor:
+        for query in ctx.captured_queries:
+            sql = query["sql"]
+            if not sql.startswith("SELECT"):
+                continue
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+            plans.append(" ".join(row[-1] for row in cursor.fetchall()))
+    return plans
+
+
+def test_views_use_feed_indexes(user_client, post_with_published_location):
+    post = post_with_published_location
+    for url, index_name in (
+        ("/", "post_published_pub_date_idx"),
+        (
+            f"/category/{post.category.slug}/",
+            "post_category_pub_date_idx",
+        ),
+        (
+            f"/profile/{post.author.username}/",
+            "post_author_pub_date_idx",
+        ),
+        (f"/posts/{post.id}/", "comment_post_created_idx"),
+    ):
+        plans = get_view_query_plans(user_client, url)
+        assert any(index_name in plan for plan in plans), (
+            f"Убедитесь, что запросы страницы `{url}` используют индекс"
+            f" `{index_name}`. Планы запросов:\n" + "\n".join(plans)
+        )
+        assert not any(
+            "SCAN blog_post" in plan and "USING" not in plan
+            for plan in plans
+        ), (
+            f"Убедитесь, что страница `{url}` не читает таблицу публикаций"
+            " полным перебором."
+        )
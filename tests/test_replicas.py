@@ -0,0 +1,61 @@
+import pytest
+from django.contrib.sessions.models import Session
+from django.test import override_settings
+from django.test.signals import template_rendered
+
+from blog.models import Post
+from blog.routers import ReplicaRouter, read_replica
+
+
+def test_router_reads_from_selected_replica():
+    router = ReplicaRouter()
+    assert router.db_for_read(Post) == "default"
+    token = read_replica.set("replica1")
+    try:
+        assert router.db_for_read(Post) == "replica1", (
+            "Убедитесь, что чтение в помеченных view идёт с реплики."
+        )
+        assert router.db_for_read(Session) == "default"
+        assert router.db_for_write(Post) == "default"
+    finally:
+        read_replica.reset(token)
+
+
+@pytest.mark.django_db
+@override_settings(BLOG_READ_REPLICAS=["default"])
+def test_user_pinned_to_primary_after_write(
+        user_client, post_with_published_location):
+    post = post_with_published_location
+    response = user_client.get("/")
+    assert response.wsgi_request.read_db == "default", (
+        "Убедитесь, что лента читается с реплики."
+    )
+    response = user_client.get("/posts/create/")
+    assert response.wsgi_request.read_db is None
+
+    user_client.post(f"/posts/{post.id}/comment/", {"text": "Новый"})
+    response = user_client.get(f"/posts/{post.id}/")
+    assert response.wsgi_request.read_db is None, (
+        "Убедитесь, что после записи пользователь читает с основной базы."
+    )
+
+
+@pytest.mark.django_db
+@override_settings(BLOG_READ_REPLICAS=["default"])
+def test_page_cache_miss_rendered_from_primary(
+        client, post_with_published_location):
+    aliases = []
+
+    def remember_alias(**kwargs):
+        aliases.append(read_replica.get())
+
+    template_rendered.connect(remember_alias)
+    try:
+        response = client.get("/")
+    finally:
+        template_rendered.disconnect(remember_alias)
+    assert response["X-Page-Cache"] == "MISS"
+    assert aliases and set(aliases) == {None}, (
+        "Убедитесь, что страница для кеша строится по основной базе,"
+        " а не по реплике."
+    )
@@ -0,0 +1,73 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def search_posts(mixer, user, published_category):
+    now = timezone.now()
+    common = dict(author=user, category=published_category, location=None)
+    return {
+        "by_title": mixer.blend(
+            "blog.Post", title="Путешествие на Байкал",
+            text="Поезд, палатка и <b>омуль</b>.", is_published=True,
+            pub_date=now, **common
+        ),
+        "by_text": mixer.blend(
+            "blog.Post", title="Заметки", text="Летом снова еду на байкал.",
+            is_published=True, pub_date=now, **common
+        ),
+        "hidden": mixer.blend(
+            "blog.Post", title="Байкал зимой", text="Черновик.",
+            is_published=False, pub_date=now, **common
+        ),
+        "scheduled": mixer.blend(
+            "blog.Post", title="Байкал весной", text="Будет позже.",
+            is_published=True, pub_date=now + timedelta(days=1), **common
+        ),
+    }
+
+
+def test_search_ranks_and_filters(client, search_posts):
+    response = client.get("/search/", {"q": "байкал"})
+    found = [post.id for post in response.context["page_obj"]]
+    assert found == [
+        search_posts["by_title"].id, search_posts["by_text"].id
+    ], (
+        "Убедитесь, что поиск выводит только опубликованные посты и ставит"
+        " совпадения в заголовке выше совпадений в тексте."
+    )
+
+
+def test_search_snippet_is_escaped(client, search_posts):
+    response = client.get("/search/", {"q": "омуль"})
+    content = response.content.decode("utf-8")
+    assert "&lt;b&gt;<mark>омуль</mark>&lt;/b&gt;" in content, (
+        "Убедитесь, что фрагмент текста экранируется, а совпадения"
+        " выделяются тегом <mark>."
+    )
+
+
+def test_search_index_follows_edits(client, search_posts):
+    post = search_posts["by_text"]
+    post.text = "Летом еду в Карелию."
+    post.save()
+    response = client.get("/search/", {"q": "карел"})
+    assert [p.id for p in response.context["page_obj"]] == [post.id]
+    response = client.get("/search/", {"q": '" OR ('})
+    assert response.status_code == 200
+    assert not response.context["page_obj"].object_list
+
+
+def test_search_limit_applies_to_visible_posts(
+        client, search_posts, monkeypatch):
+    monkeypatch.setattr("blog.search.MAX_RESULTS", 1)
+    response = client.get("/search/", {"q": "байкал"})
+    found = [post.id for post in response.context["page_obj"]]
+    assert found == [search_posts["by_title"].id], (
+        "Убедитесь, что невидимые посты отсеиваются до ограничения числа"
+        " результатов, а не после."
+    )
@@ -0,0 +1,19 @@
+import pytest
+from django.conf import settings
+from django.db import connection
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_connection_pragmas_applied():
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA busy_timeout")
+        busy_timeout = cursor.fetchone()[0]
+        cursor.execute("PRAGMA temp_store")
+        temp_store = cursor.fetchone()[0]
+    assert busy_timeout == settings.BLOG_SQLITE_PRAGMAS["busy_timeout"], (
+        "Убедитесь, что PRAGMA из BLOG_SQLITE_PRAGMAS применяются к новым"
+        " соединениям с SQLite."
+    )
+    # 2 — MEMORY.
+    assert temp_store == 2